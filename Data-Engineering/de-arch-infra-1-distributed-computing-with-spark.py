@@ -1,31 +1,411 @@
+import builtins  # pyspark.sql.functions.* below shadows sum/max/min/round
+import json
+import logging
+import math
+import statistics
+import threading
+import time
+from collections import defaultdict
+from pyspark.java_gateway import ensure_callback_server_started
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 
+TARGET_FILE_BYTES = 128 * 1024 * 1024
+
+logging.basicConfig(level=logging.INFO)
+
+class TaskTimeListener:
+    """
+    SparkListener (via the py4j callback server) that records task durations per
+    stage, so straggler tasks from skewed keys show up in `report()`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.task_ms = defaultdict(list)
+        self.records_read = defaultdict(list)
+        self.stage_names = {}
+
+    def onTaskEnd(self, task_end):
+        metrics = task_end.taskMetrics()
+        with self._lock:
+            self.task_ms[task_end.stageId()].append(task_end.taskInfo().duration())
+            if metrics is not None:
+                self.records_read[task_end.stageId()].append(
+                    metrics.inputMetrics().recordsRead() + metrics.shuffleReadMetrics().recordsRead()
+                )
+
+    def onStageCompleted(self, stage_completed):
+        info = stage_completed.stageInfo()
+        with self._lock:
+            self.stage_names[info.stageId()] = info.name()
+
+    def __getattr__(self, name):
+        # every other SparkListenerInterface callback is a no-op
+        if name.startswith("on"):
+            return lambda *args: None
+        raise AttributeError(name)
+
+    def report(self):
+        """Per-stage task-time distribution; skew_ratio = max / median task time"""
+        with self._lock:
+            stages = []
+            for stage_id, durations in sorted(self.task_ms.items()):
+                durations = sorted(durations)
+                median = statistics.median(durations)
+                records = self.records_read.get(stage_id) or [0]
+                stages.append({
+                    "stage_id": stage_id,
+                    "name": self.stage_names.get(stage_id),
+                    "tasks": len(durations),
+                    "p50_ms": median,
+                    "p95_ms": durations[builtins.min(len(durations) - 1, int(0.95 * len(durations)))],
+                    "max_ms": durations[-1],
+                    "skew_ratio": builtins.round(durations[-1] / median, 2) if median else None,
+                    "max_records": builtins.max(records),
+                    "median_records": statistics.median(records),
+                })
+            return stages
+
+    class Java:
+        implements = ["org.apache.spark.scheduler.SparkListenerInterface"]
+
+
 class SparkProcessor:
     def __init__(self):
         self.spark = SparkSession.builder \
             .appName("DataPipeline") \
             .config("spark.sql.adaptive.enabled", "true") \
             .config("spark.sql.adaptive.coalescePartitions.enabled", "true") \
+            .config("spark.sql.sources.partitionOverwriteMode", "dynamic") \
             .getOrCreate()
-    
-    def process_large_dataset(self, input_path):
-        """Process terabytes of data efficiently"""
-        df = self.spark.read.parquet(input_path)
-        
-        # Optimized transformations
-        result = df.filter(col("active") == True) \
-            .groupBy("category", "date") \
+        self.task_listener = None
+        self.hot_keys = {}
+
+    def enable_task_profiling(self):
+        """Registers a TaskTimeListener on the SparkContext (once)"""
+        if self.task_listener is None:
+            sc = self.spark.sparkContext
+            ensure_callback_server_started(sc._gateway)
+            self.task_listener = TaskTimeListener()
+            sc._jsc.sc().addSparkListener(self.task_listener)
+        return self.task_listener
+
+    def write_skew_report(self, path):
+        report = {
+            "hot_keys": self.hot_keys,
+            "stages": self.task_listener.report() if self.task_listener else [],
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        return report
+
+    def profile_keys(self, df, key="category", sample_fraction=0.01, hot_share=0.05):
+        """
+        Samples key frequencies; keys holding at least `hot_share` of the sampled
+        rows are returned as {key: share}.
+        """
+        sampled = df.sample(fraction=sample_fraction, seed=42).groupBy(key).count().collect()
+        total = builtins.sum(r["count"] for r in sampled)
+        if not total:
+            return {}
+        return {r[key]: r["count"] / total for r in sampled if r["count"] / total >= hot_share}
+
+    def aggregate(self, df, hot_keys=None, salt_buckets=None):
+        """
+        sum/count per (category, date); amount_count counts non-null amounts so
+        avg_amount keeps avg()'s null semantics. Hot categories are aggregated in two
+        phases: first per (category, date, salt) so their rows spread across
+        `salt_buckets` tasks, then the partials are summed.
+        """
+        if not hot_keys:
+            return df.groupBy("category", "date").agg(
+                sum("amount").alias("total_amount"),
+                count("*").alias("transaction_count"),
+                count("amount").alias("amount_count")
+            )
+        if salt_buckets is None:
+            salt_buckets = int(self.spark.conf.get("spark.sql.shuffle.partitions"))
+        salt = when(col("category").isin(list(hot_keys)), (rand(seed=7) * salt_buckets).cast("int")) \
+            .otherwise(lit(0))
+        return df.withColumn("_salt", salt) \
+            .groupBy("category", "date", "_salt") \
             .agg(
                 sum("amount").alias("total_amount"),
                 count("*").alias("transaction_count"),
-                avg("amount").alias("avg_amount")
+                count("amount").alias("amount_count")
             ) \
-            .withColumn("processing_time", current_timestamp())
-        
-        # Dynamic partitioning for output
-        result.repartition("date") \
+            .groupBy("category", "date") \
+            .agg(
+                sum("total_amount").alias("total_amount"),
+                sum("transaction_count").alias("transaction_count"),
+                sum("amount_count").alias("amount_count")
+            )
+
+    def process_large_dataset(self, input_path, output_path="s3://bucket/processed/",
+                              target_file_bytes=TARGET_FILE_BYTES, skew_aware=False):
+        """
+        Process terabytes of data efficiently. Also (re)seeds the incremental
+        manifest with exactly the input files read, so a later process_incremental
+        only merges files that arrive after this run.
+        """
+        files = self._input_files(input_path)
+        manifest = self._manifest(output_path)
+        batch_id = int(time.time() * 1000)
+        self.spark.createDataFrame([(f, batch_id) for f in files], "path string, batch_id long") \
+            .write.mode("overwrite").parquet(f"{manifest}/rebuilding")
+
+        df = self.spark.read.option("basePath", input_path).parquet(*files)
+        active = df.filter(col("active") == True)
+
+        hot_keys = None
+        if skew_aware:
+            self.enable_task_profiling()
+            hot_keys = self.hot_keys = self.profile_keys(active)
+            logging.info(f"Hot categories (sampled share): {hot_keys}")
+
+        # Optimized transformations; avg is derived from sum / non-null count so both paths agree
+        result = self.aggregate(active, hot_keys) \
+            .withColumn("avg_amount", col("total_amount") / col("amount_count")) \
+            .withColumn("processing_time", current_timestamp()) \
+            .withColumn("batch_id", lit(batch_id))
+
+        self.write_partitioned(result, output_path, target_file_bytes)
+
+        fs, _ = self._fs(manifest)
+        for stale in ("committed", "pending", "pending_dates"):
+            fs.delete(self._path(f"{manifest}/{stale}"), True)
+        fs.rename(self._path(f"{manifest}/rebuilding"), self._path(f"{manifest}/committed"))
+
+    def process_incremental(self, input_path, output_path="s3://bucket/processed/",
+                            target_file_bytes=TARGET_FILE_BYTES):
+        """
+        Incremental aggregation: only input files not yet in the manifest are read.
+        Their partial sum/count per (category, date) are merged into the affected
+        date partitions of the existing output, avg is derived from the merged
+        sum/count, and only those dates are rewritten (dynamic partition overwrite).
+
+        The manifest lives under `{output_path}/_manifest` and is (re)seeded by
+        process_large_dataset. A batch is recorded as pending, with its input files
+        and affected dates, before the write and committed after. Output rows carry
+        the batch_id, so an interrupted run is settled per date partition on the
+        next run: dates already holding the batch are kept, the rest are re-merged.
+        """
+        manifest = self._manifest(output_path)
+        processed = self._committed_files(manifest, input_path, output_path, target_file_bytes)
+
+        new_files = [f for f in self._input_files(input_path) if f not in processed]
+        if not new_files:
+            logging.info("No new input files; aggregate is up to date")
+            return
+
+        batch_id = int(time.time() * 1000)
+        partial = self._partial(input_path, new_files)
+        dates = [str(r["date"]) for r in partial.select("date").distinct().collect()]
+        self.spark.createDataFrame([(f, batch_id) for f in new_files], "path string, batch_id long") \
+            .write.mode("overwrite").parquet(f"{manifest}/pending")
+        self.spark.createDataFrame([(d, batch_id) for d in dates], "date string, batch_id long") \
+            .write.mode("overwrite").parquet(f"{manifest}/pending_dates")
+
+        self._merge(partial, dates, batch_id, output_path, target_file_bytes)
+        self._commit_pending(manifest)
+        logging.info(f"Merged {len(new_files)} new files into {len(dates)} date partitions")
+
+    def _manifest(self, output_path):
+        return f"{output_path.rstrip('/')}/_manifest"
+
+    def _input_files(self, input_path):
+        fs, root = self._fs(input_path)
+        found, files = [], fs.listFiles(root, True)
+        while files.hasNext():
+            path = files.next().getPath().toString()
+            if path.endswith(".parquet") and "/_" not in path:
+                found.append(path)
+        return found
+
+    def _has_output(self, output_path):
+        fs, root = self._fs(output_path)
+        return fs.exists(root) and any(
+            s.isDirectory() and s.getPath().getName().startswith("date=") for s in fs.listStatus(root)
+        )
+
+    def _read_output(self, output_path):
+        # mergeSchema: older files may predate the batch_id/amount_count columns
+        return self.spark.read.option("mergeSchema", "true").parquet(output_path)
+
+    def _partial(self, input_path, files):
+        return self.aggregate(
+            self.spark.read.option("basePath", input_path).parquet(*files).filter(col("active") == True)
+        )
+
+    def _merge(self, partial, dates, batch_id, output_path, target_file_bytes):
+        """Merges partial sum/counts into the output partitions for `dates` and rewrites them"""
+        merged = partial
+        if dates and self._has_output(output_path):
+            existing = self._read_output(output_path) \
+                .where(col("date").cast("string").isin(dates)) \
+                .select(
+                    "category", "date", "total_amount", "transaction_count",
+                    coalesce(col("amount_count"), col("transaction_count")).alias("amount_count")
+                )
+            merged = existing.unionByName(partial) \
+                .groupBy("category", "date") \
+                .agg(
+                    sum("total_amount").alias("total_amount"),
+                    sum("transaction_count").alias("transaction_count"),
+                    sum("amount_count").alias("amount_count")
+                )
+        merged = merged \
+            .withColumn("avg_amount", col("total_amount") / col("amount_count")) \
+            .withColumn("processing_time", current_timestamp()) \
+            .withColumn("batch_id", lit(batch_id))
+
+        # cut lineage to the output files, since the affected partitions are overwritten below
+        merged = merged.localCheckpoint()
+        self.write_partitioned(merged, output_path, target_file_bytes)
+
+    def _committed_files(self, manifest, input_path, output_path, target_file_bytes):
+        """
+        Processed input paths. Refuses to run on output without a manifest (or
+        with an interrupted full recompute), and settles a pending batch left
+        behind by an interrupted incremental run, partition by partition.
+        """
+        fs, _ = self._fs(manifest)
+        if fs.exists(self._path(f"{manifest}/rebuilding")):
+            raise RuntimeError(
+                f"A full recompute into {output_path} did not finish; rerun process_large_dataset"
+            )
+        if not fs.exists(self._path(f"{manifest}/committed")):
+            if self._has_output(output_path):
+                raise RuntimeError(
+                    f"{output_path} has output but no manifest; run process_large_dataset to seed it"
+                )
+            return set()
+
+        if fs.exists(self._path(f"{manifest}/pending")):
+            pending = self.spark.read.parquet(f"{manifest}/pending")
+            batch_id = pending.first()["batch_id"]
+            dates = {r["date"] for r in self.spark.read.parquet(f"{manifest}/pending_dates").collect()}
+            written = set()
+            if dates and self._has_output(output_path):
+                written = {
+                    str(r["date"]) for r in self._read_output(output_path)
+                    .where(col("date").cast("string").isin(list(dates)) & (col("batch_id") == batch_id))
+                    .select("date").distinct().collect()
+                }
+            missing = sorted(dates - written)
+            if missing:
+                logging.warning(f"Re-merging batch {batch_id} into unfinished partitions: {missing}")
+                files = [r["path"] for r in pending.select("path").collect()]
+                partial = self._partial(input_path, files).where(col("date").cast("string").isin(missing))
+                self._merge(partial, missing, batch_id, output_path, target_file_bytes)
+            self._commit_pending(manifest)
+        return {r["path"] for r in self.spark.read.parquet(f"{manifest}/committed").select("path").collect()}
+
+    def _commit_pending(self, manifest):
+        fs, _ = self._fs(manifest)
+        self.spark.read.parquet(f"{manifest}/pending") \
+            .write.mode("append").parquet(f"{manifest}/committed")
+        fs.delete(self._path(f"{manifest}/pending"), True)
+        fs.delete(self._path(f"{manifest}/pending_dates"), True)
+
+    def write_partitioned(self, df, output_path, target_file_bytes=TARGET_FILE_BYTES):
+        """
+        Dynamic partition overwrite: only the dates present in `df` are replaced.
+        Files are capped near `target_file_bytes` via maxRecordsPerFile, using the
+        plan's uncompressed bytes/row, so files land at or below the target
+        (compact() merges any that come out small).
+        """
+        row_bytes = self._estimated_row_bytes(df)
+        df.repartition("date") \
+            .sortWithinPartitions("category") \
             .write \
             .partitionBy("date") \
             .mode("overwrite") \
-            .parquet("s3://bucket/processed/")
\ No newline at end of file
+            .option("maxRecordsPerFile", builtins.max(1, target_file_bytes // row_bytes)) \
+            .parquet(output_path)
+
+    def compact(self, output_path, target_file_bytes=TARGET_FILE_BYTES, sort_by="category",
+                small_file_ratio=0.5):
+        """
+        OPTIMIZE-style compaction: rewrites each date partition holding more than one
+        file below `small_file_ratio * target_file_bytes` into ~target-sized files,
+        range-partitioned and sorted by `sort_by` so file min/max stats prune well.
+        """
+        fs, root = self._fs(output_path)
+        compacted = []
+        for status in fs.listStatus(root):
+            partition = status.getPath()
+            if not status.isDirectory() or not partition.getName().startswith("date="):
+                continue
+            files = [f for f in fs.listStatus(partition) if f.getPath().getName().endswith(".parquet")]
+            small = [f for f in files if f.getLen() < small_file_ratio * target_file_bytes]
+            if len(files) < 2 or len(small) < 2:
+                continue
+
+            total_bytes = builtins.sum(f.getLen() for f in files)
+            n_files = builtins.max(1, math.ceil(total_bytes / target_file_bytes))
+            staging = self._path(f"{root.toString()}/_compaction/{partition.getName()}")
+            self.spark.read.parquet(partition.toString()) \
+                .repartitionByRange(n_files, sort_by) \
+                .sortWithinPartitions(sort_by) \
+                .write \
+                .mode("overwrite") \
+                .parquet(staging.toString())
+
+            self._swap_partition(fs, root, partition, staging)
+            compacted.append((partition.getName(), len(files), n_files))
+            logging.info(f"Compacted {partition.getName()}: {len(files)} -> {n_files} files")
+        fs.delete(self._path(f"{root.toString()}/_compaction"), True)
+        return compacted
+
+    def _swap_partition(self, fs, root, partition, staging):
+        """
+        Replaces `partition` with `staging` using two directory renames (each atomic
+        on HDFS/local filesystems). The original files are kept as a backup until
+        the new ones are in place and restored if the second rename fails, so a
+        failure never loses the partition.
+        """
+        backup = self._path(f"{root.toString()}/_compaction/{partition.getName()}.old")
+        if not fs.rename(partition, backup):
+            raise IOError(f"Could not move {partition} aside for compaction")
+        try:
+            if not fs.rename(staging, partition):
+                raise IOError(f"Could not move compacted files into {partition}")
+        except Exception:
+            if fs.exists(partition):
+                fs.delete(partition, True)
+            fs.rename(backup, partition)
+            raise
+        fs.delete(backup, True)
+
+    def _path(self, path):
+        return self.spark._jvm.org.apache.hadoop.fs.Path(path)
+
+    def _fs(self, path):
+        hadoop_path = self._path(path)
+        return hadoop_path.getFileSystem(self.spark._jsc.hadoopConfiguration()), hadoop_path
+
+    def _estimated_row_bytes(self, df):
+        # Catalyst's uncompressed size estimate when row counts are known, otherwise
+        # the schema's fixed per-row default size; never triggers a job
+        stats = df._jdf.queryExecution().optimizedPlan().stats()
+        if stats.rowCount().isDefined():
+            rows = stats.rowCount().get().longValue()
+            if rows:
+                return builtins.max(1, int(stats.sizeInBytes().toString()) // rows)
+        return builtins.max(1, df._jdf.schema().defaultSize())
+
+
+if __name__ == "__main__":
+    # Local run: python spark_job.py <input_path> <output_dir> [--incremental | --skew-aware]
+    import sys
+
+    processor = SparkProcessor()
+    if "--incremental" in sys.argv:
+        processor.process_incremental(sys.argv[1], sys.argv[2])
+    else:
+        processor.process_large_dataset(sys.argv[1], sys.argv[2], skew_aware="--skew-aware" in sys.argv)
+    processor.compact(sys.argv[2])
+    if processor.task_listener is not None:
+        for stage in processor.write_skew_report("skew_report.json")["stages"]:
+            logging.info(f"Stage task times: {stage}")
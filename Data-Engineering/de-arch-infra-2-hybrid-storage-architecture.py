@@ -1,35 +1,484 @@
+import hashlib
+import json
+import logging
+import math
+import operator
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+import redis
+from sqlalchemy import MetaData, Table, and_, create_engine, or_, select, text
+
+
+@dataclass
+class Query:
+    """A federated query: `sql` goes to the warehouse, otherwise `dataset` is scanned in the lake"""
+    sql: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    dataset: Optional[str] = None
+    columns: Optional[List[str]] = None
+    filters: Optional[List[Tuple[str, str, Any]]] = None  # pyarrow DNF, e.g. [("region", "=", "eu")]
+
+    def is_structured(self):
+        return self.sql is not None
+
+    @property
+    def key(self):
+        spec = json.dumps(
+            [self.sql, self.params, self.dataset, self.columns, self.filters], sort_keys=True, default=str
+        )
+        return "q:" + hashlib.sha1(spec.encode()).hexdigest()
+
+
+class S3Storage:
+    """Parquet data lake on S3 (or a local directory, e.g. root='/tmp/lake')"""
+    def __init__(self, root='s3://my-data-lake'):
+        self.fs, self.root = pafs.FileSystem.from_uri(root)
+
+    def store(self, key, data, storage_class='STANDARD'):
+        # storage_class maps to an S3 lifecycle rule on the prefix; local directories ignore it
+        path = f"{self.root}/{key}/part-{uuid.uuid4().hex}.parquet"
+        self.fs.create_dir(f"{self.root}/{key}", recursive=True)
+        pq.write_table(pa.Table.from_pandas(data, preserve_index=False), path, filesystem=self.fs)
+        return path
+
+    def scan(self, key, columns=None, filters=None):
+        """Predicate and projection pushdown: only matching partitions/row groups and columns are read"""
+        dataset = ds.dataset(f"{self.root}/{key}", filesystem=self.fs, format='parquet', partitioning='hive')
+        return dataset.to_table(
+            columns=columns,
+            filter=pq.filters_to_expression(filters) if filters else None,
+        ).to_pandas()
+
+
+class SnowflakeWarehouse:
+    """Warehouse tier behind SQLAlchemy (snowflake://... in production, sqlite:// for local runs)"""
+    def __init__(self, conn_str='sqlite:///warehouse.db'):
+        self.engine = create_engine(conn_str)
+
+    def load(self, key, data, clustering_keys=None):
+        data.to_sql(key, self.engine, if_exists='append', index=False, chunksize=10_000)
+        if clustering_keys and self.engine.dialect.name == 'snowflake':
+            with self.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {key} CLUSTER BY ({', '.join(clustering_keys)})"))
+        return key
+
+    def query(self, query):
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(query.sql), conn, params=query.params)
+
+    def scan(self, key, columns=None, filters=None):
+        """Lake-style read of a promoted dataset, with filters compiled to a WHERE clause"""
+        table = Table(key, MetaData(), autoload_with=self.engine)
+        stmt = select(*[table.c[c] for c in columns]) if columns else select(table)
+        if filters:
+            groups = [filters] if isinstance(filters[0], tuple) else filters
+            stmt = stmt.where(or_(*[and_(*[_SQL_OPS[op](table.c[col], val) for col, op, val in g]) for g in groups]))
+        with self.engine.connect() as conn:
+            return pd.read_sql(stmt, conn)
+
+    def read_table(self, key):
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(f"SELECT * FROM {key}"), conn)
+
+    def drop(self, key):
+        with self.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {key}"))
+
+
+_SQL_OPS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    'in': lambda col, val: col.in_(list(val)), 'not in': lambda col, val: col.not_in(list(val)),
+}
+
+
+class RedisCache:
+    """Hot tier; pass a fakeredis.FakeRedis() client for local runs"""
+    def __init__(self, client=None):
+        self.client = client or redis.Redis()
+
+    def get(self, key):
+        # a single GET: None means miss (no separate EXISTS round trip)
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=3600):
+        return self.client.set(key, value, ex=max(1, int(ttl)) if ttl else None)
+
+    def delete(self, key):
+        return self.client.delete(key)
+
+    def tag(self, tag, key, ttl=3600):
+        """Remember that `key` derives from `tag` (a dataset), for invalidate()"""
+        pipe = self.client.pipeline()
+        pipe.sadd(tag, key)
+        pipe.expire(tag, max(1, int(ttl)))
+        pipe.execute()
+
+    def invalidate(self, tag):
+        """Delete every key tagged with `tag`"""
+        keys = self.client.smembers(tag)
+        if keys:
+            self.client.delete(*keys)
+        self.client.delete(tag)
+
+
+def _to_bytes(df):
+    # Arrow IPC rather than pickle: a shared cache must never be able to run code on read
+    sink = pa.BufferOutputStream()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _from_bytes(payload):
+    return pa.ipc.open_stream(pa.BufferReader(payload)).read_all().to_pandas()
+
+
+class AccessTracker:
+    """
+    Exponentially decaying access counters: each key keeps only (score, last_seen),
+    and a score halves every `half_life_seconds` without access, so it reflects
+    both frequency and recency.
+    """
+    def __init__(self, half_life_seconds=3600):
+        self.decay = math.log(2) / half_life_seconds
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, weight=1.0):
+        now = time.time()
+        with self._lock:
+            score, last = self._counters.get(key, (0.0, now))
+            self._counters[key] = (score * math.exp(-self.decay * (now - last)) + weight, now)
+
+    def score(self, key):
+        score, last = self._counters.get(key, (0.0, time.time()))
+        return score * math.exp(-self.decay * (time.time() - last))
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            return {k: s * math.exp(-self.decay * (now - t)) for k, (s, t) in self._counters.items()}
+
+
+class PlacementStore:
+    """Durable record of which tiers hold each dataset, so placement survives restarts"""
+    def __init__(self, path='tier_placement.db'):
+        self.path = path
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS placement (key TEXT PRIMARY KEY, tiers TEXT NOT NULL, bytes INTEGER NOT NULL)"
+            )
+
+    def load(self):
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute("SELECT key, tiers, bytes FROM placement").fetchall()
+        return {key: {'tiers': set(json.loads(tiers)), 'bytes': size} for key, tiers, size in rows}
+
+    def save(self, key, entry):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO placement VALUES (?, ?, ?)",
+                (key, json.dumps(sorted(entry['tiers'])), entry['bytes']),
+            )
+
+
 class HybridStorage:
-    def __init__(self):
-        self.data_lake = S3Storage()
-        self.data_warehouse = SnowflakeWarehouse()
-        self.cache = RedisCache()
-    
-    def store_data(self, data, access_pattern):
-        """Route data to appropriate storage tier"""
-        if access_pattern == 'archival':
+    def __init__(self, data_lake=None, data_warehouse=None, cache=None,
+                 base_ttl=3600, min_ttl=60, max_cache_entry_bytes=8 * 1024 * 1024,
+                 placement_store=None):
+        self.data_lake = data_lake or S3Storage()
+        self.data_warehouse = data_warehouse or SnowflakeWarehouse()
+        self.cache = cache or RedisCache()
+        self.base_ttl = base_ttl
+        self.min_ttl = min_ttl
+        self.max_cache_entry_bytes = max_cache_entry_bytes
+        self.stats = Counter()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        # dataset -> {'tiers': set of tiers holding a copy, 'bytes': total in-memory size}
+        self.placement_store = placement_store or PlacementStore()
+        self.placement = self.placement_store.load()
+        self._placement_lock = threading.RLock()
+        self.tracker = AccessTracker()
+
+    def tiers_of(self, key):
+        with self._placement_lock:
+            return set(self.placement.get(key, {'tiers': {'lake'}})['tiers'])
+
+    def bytes_of(self, key):
+        with self._placement_lock:
+            return self.placement.get(key, {'bytes': 0})['bytes']
+
+    def _update_placement(self, key, add=None, discard=None, grow_bytes=0):
+        with self._placement_lock:
+            entry = self.placement.setdefault(key, {'tiers': set(), 'bytes': 0})
+            if add:
+                entry['tiers'].add(add)
+            if discard:
+                entry['tiers'].discard(discard)
+            entry['bytes'] += grow_bytes
+            self.placement_store.save(key, entry)
+
+    def store_data(self, key, data, access_pattern=None):
+        """
+        Route data to appropriate storage tier (without a pattern, land in the lake and let TierMigrator move it).
+        Writes append to every tier already holding the dataset; a tier the pattern adds is
+        seeded with the full dataset, so every tier in placement is a complete copy. A cached
+        copy is dropped (real_time writes re-cache the full dataset).
+        """
+        if access_pattern not in (None, 'archival', 'real_time', 'analytical'):
+            raise ValueError(f"Unknown access pattern: {access_pattern}")
+        # cached query results over this dataset are stale once it changes; invalidated again
+        # after the write, since a query in flight during the write can still write back its result
+        self._invalidate_results(key)
+        with self._placement_lock:
+            tiers = set(self.placement[key]['tiers']) if key in self.placement else set()
+
+        if 'cache' in tiers:
+            # drop from placement before deleting, so readers fall through to a backing tier
+            self._update_placement(key, discard='cache')
+            self.cache.delete(f"ds:{key}")
+        stored = tiers - {'cache'}
+
+        targets = set(stored)
+        if access_pattern in (None, 'archival', 'real_time'):
+            targets.add('lake')  # also the durable copy for real_time data
+        elif access_pattern == 'analytical':
+            targets.add('warehouse')
+        added = targets - stored
+
+        full = data
+        if stored and (added or access_pattern == 'real_time'):
+            full = pd.concat([self._read_backing(key), data], ignore_index=True)
+
+        result = None
+        if 'lake' in targets:
             # Cold storage in data lake
-            return self.data_lake.store(
-                data, 
-                storage_class='GLACIER'
+            result = self.data_lake.store(
+                key,
+                full if 'lake' in added else data,
+                storage_class='GLACIER' if access_pattern == 'archival' else 'STANDARD'
             )
-        elif access_pattern == 'analytical':
+        if 'warehouse' in targets:
             # Structured storage in warehouse
-            return self.data_warehouse.load(
-                data,
+            result = self.data_warehouse.load(
+                key,
+                full if 'warehouse' in added else data,
                 clustering_keys=['date', 'region']
             )
-        elif access_pattern == 'real_time':
-            # Hot storage in cache
-            return self.cache.set(
-                data,
-                ttl=3600  # 1 hour TTL
+        for tier in added:
+            self._update_placement(key, add=tier)
+        self._update_placement(key, grow_bytes=int(data.memory_usage(deep=True).sum()))
+
+        if access_pattern == 'real_time':
+            # Hot storage in cache: the whole dataset, not just this append
+            result = self.cache.set(
+                f"ds:{key}",
+                _to_bytes(full),
+                ttl=None  # resident until TierMigrator demotes it
             )
-    
+            self._update_placement(key, add='cache')
+
+        self._invalidate_results(key)
+        return result
+
+    def _read_backing(self, key):
+        """Full dataset from the warehouse or lake copy"""
+        if 'warehouse' in self.tiers_of(key):
+            return self.data_warehouse.read_table(key)
+        return self.data_lake.scan(key)
+
     def query_data(self, query):
-        """Federated query across storage layers"""
-        if self.cache.exists(query.key):
-            return self.cache.get(query.key)
-        elif query.is_structured():
-            return self.data_warehouse.query(query)
+        """Federated query across storage layers (cache-aside with write-back)"""
+        if query.dataset is not None:
+            self.tracker.record(query.dataset)
+        cached = self.cache.get(query.key)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            return _from_bytes(cached)
+        self.stats['cache_misses'] += 1
+        return self._coalesced(query.key, lambda: self._query_backend(query))
+
+    def _coalesced(self, key, fetch):
+        """Concurrent identical misses share one backend query (single-flight)"""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self.stats['coalesced'] += 1
+            return future.result()
+        try:
+            future.set_result(fetch())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+        return future.result()
+
+    def _query_backend(self, query):
+        if query.is_structured():
+            self.stats['warehouse_queries'] += 1
+            result = self.data_warehouse.query(query)
         else:
-            return self.data_lake.scan(query)
\ No newline at end of file
+            result = self._scan_dataset(query)
+        self._write_back(query.key, result, query.dataset)
+        return result
+
+    def _scan_dataset(self, query):
+        """Read a dataset from the hottest tier holding it, pushing columns/filters down"""
+        tiers = self.tiers_of(query.dataset)
+        if 'cache' in tiers:
+            cached = self.cache.get(f"ds:{query.dataset}")
+            if cached is not None:
+                self.stats['tier_cache_reads'] += 1
+                table = pa.Table.from_pandas(_from_bytes(cached), preserve_index=False)
+                return ds.dataset(table).to_table(
+                    columns=query.columns,
+                    filter=pq.filters_to_expression(query.filters) if query.filters else None,
+                ).to_pandas()
+        if 'warehouse' in tiers:
+            self.stats['tier_warehouse_reads'] += 1
+            return self.data_warehouse.scan(query.dataset, columns=query.columns, filters=query.filters)
+        self.stats['tier_lake_reads'] += 1
+        return self.data_lake.scan(query.dataset, columns=query.columns, filters=query.filters)
+
+    def tier_hit_ratios(self):
+        """Share of reads served by each tier (result cache counts as 'result_cache')"""
+        reads = {
+            'result_cache': self.stats['cache_hits'],
+            'cache': self.stats['tier_cache_reads'],
+            'warehouse': self.stats['tier_warehouse_reads'] + self.stats['warehouse_queries'],
+            'lake': self.stats['tier_lake_reads'],
+        }
+        total = sum(reads.values()) or 1
+        return {tier: n / total for tier, n in reads.items()}
+
+    def _write_back(self, key, result, dataset=None):
+        """
+        Populate the cache; bigger results get shorter TTLs, oversized ones are not
+        cached. Results are tagged with their dataset so store_data can invalidate
+        them (set Query.dataset on SQL queries to get the same for warehouse tables).
+        """
+        payload = _to_bytes(result)
+        if len(payload) > self.max_cache_entry_bytes:
+            self.stats['writeback_skipped_oversize'] += 1
+            return
+        ttl = max(self.min_ttl, self.base_ttl * (1 - len(payload) / self.max_cache_entry_bytes))
+        self.cache.set(key, payload, ttl=ttl)
+        if dataset is not None:
+            self.cache.tag(f"tags:{dataset}", key, ttl=self.base_ttl)
+        self.stats['writebacks'] += 1
+
+    def _invalidate_results(self, key):
+        self.cache.invalidate(f"tags:{key}")
+
+
+class TierMigrator:
+    """
+    Background thread that moves datasets between tiers by decayed access score.
+
+    Hot lake data is promoted to the warehouse (score >= warehouse_threshold) and
+    then into the cache (score >= cache_threshold), hottest first, while the tier
+    budgets allow; datasets whose score drops below cold_threshold are demoted.
+    The lake stays the system of record, so promotions copy and demotions drop
+    (a warehouse-only dataset is exported to the lake before it is dropped).
+    """
+    def __init__(self, storage, interval_seconds=300, cache_threshold=50.0, warehouse_threshold=10.0,
+                 cold_threshold=1.0, cache_budget_bytes=512 * 1024 * 1024,
+                 warehouse_budget_bytes=50 * 1024 ** 3):
+        self.storage = storage
+        self.interval_seconds = interval_seconds
+        self.thresholds = {'cache': cache_threshold, 'warehouse': warehouse_threshold}
+        self.cold_threshold = cold_threshold
+        self.budgets = {'cache': cache_budget_bytes, 'warehouse': warehouse_budget_bytes}
+        # migration cost metrics: counts, bytes and seconds per direction
+        self.metrics = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='tier-migrator', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Tier migration cycle failed: {e}")
+
+    def _used(self, tier):
+        with self.storage._placement_lock:
+            return sum(e['bytes'] for e in self.storage.placement.values() if tier in e['tiers'])
+
+    def _record(self, direction, key, started):
+        size = self.storage.bytes_of(key)
+        self.metrics[f"{direction}_count"] += 1
+        self.metrics[f"{direction}_bytes"] += size
+        self.metrics[f"{direction}_seconds"] += time.perf_counter() - started
+        logging.info(f"Migrated {key} ({direction}, {size} bytes)")
+
+    def run_once(self):
+        storage = self.storage
+        scores = storage.tracker.snapshot()
+        with storage._placement_lock:
+            keys = list(storage.placement)
+
+        # demote cold data first so promotions can use the freed budget; a tier is
+        # removed from placement before its copy is deleted, so readers never hit a dropped copy
+        for key in keys:
+            if scores.get(key, 0.0) >= self.cold_threshold:
+                continue
+            tiers = storage.tiers_of(key)
+            if 'cache' in tiers:
+                started = time.perf_counter()
+                storage._update_placement(key, discard='cache')
+                storage.cache.delete(f"ds:{key}")
+                self._record('cache_demote', key, started)
+            if 'warehouse' in tiers:
+                started = time.perf_counter()
+                if 'lake' not in tiers:
+                    storage.data_lake.store(key, storage.data_warehouse.read_table(key))
+                    storage._update_placement(key, add='lake')
+                storage._update_placement(key, discard='warehouse')
+                storage.data_warehouse.drop(key)
+                self._record('warehouse_demote', key, started)
+
+        for key in sorted(keys, key=lambda k: scores.get(k, 0.0), reverse=True):
+            score = scores.get(key, 0.0)
+            for tier in ('warehouse', 'cache'):
+                tiers = storage.tiers_of(key)
+                if tier in tiers or score < self.thresholds[tier]:
+                    continue
+                if self._used(tier) + storage.bytes_of(key) > self.budgets[tier]:
+                    self.metrics[f"{tier}_promote_over_budget"] += 1
+                    continue
+                started = time.perf_counter()
+                data = storage._read_backing(key)
+                if tier == 'warehouse':
+                    storage.data_warehouse.load(key, data, clustering_keys=['date', 'region'])
+                else:
+                    storage.cache.set(f"ds:{key}", _to_bytes(data), ttl=None)
+                storage._update_placement(key, add=tier)
+                self._record(f"{tier}_promote", key, started)
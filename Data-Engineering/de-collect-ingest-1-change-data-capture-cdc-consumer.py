@@ -1,5 +1,15 @@
+import asyncio
 import faust
 import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future
+from sqlalchemy import MetaData, Table, create_engine, tuple_
+from sqlalchemy.dialects.postgresql import insert
 
 # ---
 # This example shows the CONSUMER side of CDC.
@@ -13,6 +23,23 @@ logging.basicConfig(level=logging.INFO)
 # 1. Define the Faust app and Kafka broker
 app = faust.App('cdc-processor', broker='kafka://localhost:9092')
 
+# Batching: flush every BATCH_SIZE events or BATCH_WINDOW_SECONDS, whichever comes first
+BATCH_SIZE = int(os.environ.get('CDC_BATCH_SIZE', 5000))
+BATCH_WINDOW_SECONDS = float(os.environ.get('CDC_BATCH_WINDOW_SECONDS', 1.0))
+
+# Failed batches are retried in place, then parked on the dead-letter topic so the stream keeps moving
+APPLY_RETRIES = int(os.environ.get('CDC_APPLY_RETRIES', 5))
+RETRY_BACKOFF_SECONDS = float(os.environ.get('CDC_RETRY_BACKOFF_SECONDS', 0.5))
+
+# Parallelism: 0 = apply each batch inline; N > 0 = shard by primary-key hash across N workers
+NUM_SHARDS = int(os.environ.get('CDC_SHARDS', 0))
+SHARD_QUEUE_SIZE = int(os.environ.get('CDC_SHARD_QUEUE_SIZE', 4))
+
+# Source table -> (downstream table, primary key columns)
+TARGET_TABLES = {
+    'customers': ('dim_users', ['id']),
+}
+
 # 2. Define the complex structure of a Debezium CDC event
 # We only map the fields we care about. 'before' is null on CREATE.
 class DebeziumPayload(faust.Record):
@@ -24,9 +51,122 @@ class DebeziumPayload(faust.Record):
 
 # 3. Define the Kafka topic, using our DebeziumPayload type
 cdc_topic = app.topic('db.public.customers', value_type=DebeziumPayload)
+dead_letter_topic = app.topic('db.public.customers.dlq', value_type=DebeziumPayload)
+
+def collapse_changes(events) -> dict:
+    """
+    Folds a batch of Debezium events into the final state per (table, primary key).
+
+    Returns {(table, key): (op, row, ts_ms, before)} where op is 'create', 'update'
+    or 'delete'; later events for the same key overwrite earlier ones, so only the
+    last state survives. A key first seen as a create/snapshot read ('c'/'r') stays
+    a create, and `before` is the state before the first change in the batch.
+    """
+    final = {}
+    for event in events:
+        table = event.source.get('table')
+        if table not in TARGET_TABLES:
+            continue
+        row = event.before if event.op == 'd' else event.after
+        if row is None:
+            continue
+        key = tuple(row[c] for c in TARGET_TABLES[table][1])
+        first = final.get((table, key))
+        if event.op == 'd':
+            op = 'delete'
+        elif first is not None:
+            op = 'create' if first[0] == 'create' else 'update'
+        else:
+            op = 'create' if event.op in ('c', 'r') else 'update'
+        before = first[3] if first is not None else event.before
+        final[(table, key)] = (op, row, event.ts_ms, before)
+    return final
+
+
+class BatchingSink:
+    """
+    Applies collapsed change batches to a PostgreSQL target: one bulk upsert and
+    one bulk delete per table, all inside a single transaction.
+    """
+
+    # PostgreSQL caps bind parameters per statement at 65535
+    MAX_PARAMS = 65535
+
+    def __init__(self, db_conn_str: str, pool_size: int = 5):
+        self.engine = create_engine(db_conn_str, pool_size=pool_size, pool_pre_ping=True)
+        self.metadata = MetaData()
+        self._tables = {}
+
+    def _table(self, name: str) -> Table:
+        if name not in self._tables:
+            self._tables[name] = Table(name, self.metadata, autoload_with=self.engine)
+        return self._tables[name]
+
+    def apply(self, changes: dict):
+        """Writes the batch atomically; raises (and rolls back) on any failure."""
+        by_table = {}
+        for (source_table, key), (op, row, _, _) in changes.items():
+            upserts, deletes = by_table.setdefault(source_table, ([], []))
+            (deletes if op == 'delete' else upserts).append(key if op == 'delete' else row)
+
+        with self.engine.begin() as conn:
+            for source_table, (upserts, deletes) in by_table.items():
+                target_name, pk = TARGET_TABLES[source_table]
+                table = self._table(target_name)
+                # one statement per column set, so a row never loses (or NULLs) columns another row lacks
+                by_columns = {}
+                for row in upserts:
+                    columns = tuple(c for c in table.columns.keys() if c in row)
+                    by_columns.setdefault(columns, []).append(row)
+                for columns, rows in by_columns.items():
+                    step = max(1, self.MAX_PARAMS // len(columns))
+                    for start in range(0, len(rows), step):
+                        stmt = insert(table).values([
+                            {c: row[c] for c in columns} for row in rows[start:start + step]
+                        ])
+                        update_columns = {c: stmt.excluded[c] for c in columns if c not in pk}
+                        if update_columns:
+                            stmt = stmt.on_conflict_do_update(index_elements=pk, set_=update_columns)
+                        else:
+                            stmt = stmt.on_conflict_do_nothing(index_elements=pk)
+                        conn.execute(stmt)
+                if deletes:
+                    step = max(1, self.MAX_PARAMS // len(pk))
+                    for start in range(0, len(deletes), step):
+                        conn.execute(
+                            table.delete().where(
+                                tuple_(*[table.c[c] for c in pk]).in_(deletes[start:start + step])
+                            )
+                        )
+
 
 class ChangeHandler:
     """A modular class to handle applying changes to a downstream system."""
+
+    def __init__(self, sink: BatchingSink | None = None):
+        self.sink = sink
+
+    def handle_batch(self, events: list):
+        """Collapses a batch and applies it through the sink (or the per-event handlers)."""
+        started = time.perf_counter()
+        changes = collapse_changes(events)
+        self.apply_changes(changes)
+        logging.info(
+            f"Applied batch: {len(events)} events -> {len(changes)} rows "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+
+    def apply_changes(self, changes: dict):
+        if self.sink is not None:
+            self.sink.apply(changes)
+        else:
+            for op, row, _, before in changes.values():
+                if op == 'delete':
+                    self.handle_delete(row)
+                elif op == 'update':
+                    self.handle_update(before or {}, row)
+                else:
+                    self.handle_create(row)
     
     def handle_create(self, record: dict):
         # Logic to insert the new record into a data warehouse, search index, etc.
@@ -43,31 +183,257 @@ class ChangeHandler:
         logging.warning(f"DELETE: User {record.get('id')}")
         # e.g., db.execute("UPDATE dim_users SET is_active = false WHERE id = ...", record)
 
+class ShardedExecutor:
+    """
+    Runs handler work on `num_shards` worker threads, routing each primary key
+    to a fixed shard (stable CRC32 hash). Per-key order is preserved because a
+    shard drains its queue FIFO; different keys proceed in parallel, so one slow
+    downstream call only stalls its own shard.
+
+    Shard queues are bounded, so `submit` blocks when workers fall behind
+    (backpressure on the consumer instead of unbounded buffering). Each shard
+    applies its slice of a batch in its own transaction, so in this mode a batch
+    is no longer applied atomically as a whole; a failed slice is retried in
+    place and, if it keeps failing, reported through its Future.
+    """
+
+    def __init__(self, handler: 'ChangeHandler', num_shards: int, queue_size: int = 4):
+        self.handler = handler
+        self.num_shards = num_shards
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(num_shards)]
+        self.metrics = [
+            {'applied_rows': 0, 'batches': 0, 'busy_seconds': 0.0, 'last_ts_ms': None}
+            for _ in range(num_shards)
+        ]
+        self._lock = threading.Lock()
+        for i in range(num_shards):
+            threading.Thread(target=self._worker, args=(i,), name=f"cdc-shard-{i}", daemon=True).start()
+
+    def shard_of(self, table: str, key: tuple) -> int:
+        return zlib.crc32(repr((table, key)).encode()) % self.num_shards
+
+    def submit(self, events: list) -> list:
+        """
+        Splits a batch of Debezium events by shard, collapses each slice and enqueues it.
+        Returns [(future, slice_events)] for every non-empty shard.
+        """
+        slices = [[] for _ in range(self.num_shards)]
+        for event in events:
+            row = event.before if event.op == 'd' else event.after
+            table = event.source.get('table')
+            if row is None or table not in TARGET_TABLES:
+                continue
+            key = tuple(row[c] for c in TARGET_TABLES[table][1])
+            slices[self.shard_of(table, key)].append(event)
+        submitted = []
+        for i, slice_events in enumerate(slices):
+            if slice_events:
+                future = Future()
+                self.queues[i].put((collapse_changes(slice_events), future))
+                submitted.append((future, slice_events))
+        return submitted
+
+    def _worker(self, shard: int):
+        while True:
+            part, future = self.queues[shard].get()
+            started = time.perf_counter()
+            for attempt in range(1, APPLY_RETRIES + 1):
+                try:
+                    self.handler.apply_changes(part)
+                    break
+                except Exception as e:
+                    logging.error(f"Shard {shard} apply failed (attempt {attempt}/{APPLY_RETRIES}): {e}")
+                    if attempt == APPLY_RETRIES:
+                        future.set_exception(e)
+                    else:
+                        time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            if future.done():
+                continue
+            with self._lock:
+                m = self.metrics[shard]
+                m['applied_rows'] += len(part)
+                m['batches'] += 1
+                m['busy_seconds'] += time.perf_counter() - started
+                m['last_ts_ms'] = max(ts for _, _, ts, _ in part.values())
+            future.set_result(len(part))
+
+    def lag(self) -> list:
+        """Per-shard queue depth and replication lag (now - source ts of the last applied change)."""
+        now_ms = time.time() * 1000
+        with self._lock:
+            return [
+                {
+                    'shard': i,
+                    'queued_batches': self.queues[i].qsize(),
+                    'lag_ms': None if m['last_ts_ms'] is None else now_ms - m['last_ts_ms'],
+                    **m,
+                }
+                for i, m in enumerate(self.metrics)
+            ]
+
 # Instantiate our handler (could be passed dependencies)
-handler = ChangeHandler()
+target_db = os.environ.get('CDC_TARGET_DB')
+handler = ChangeHandler(BatchingSink(target_db, pool_size=max(5, NUM_SHARDS)) if target_db else None)
+executor = ShardedExecutor(handler, NUM_SHARDS, SHARD_QUEUE_SIZE) if NUM_SHARDS else None
 
 # 4. Define the Faust agent to process the CDC stream
 @app.agent(cdc_topic)
 async def process_cdc_stream(events):
     """
-    Consumes the CDC event stream and routes events based on operation type.
+    Consumes the CDC event stream in micro-batches and applies each batch in one transaction.
+
+    `take()` acks the buffered events only once the loop body returns, and Faust
+    commits only acked offsets, so offsets advance after the batch is durable.
+    A failed batch is retried in place with backoff (the upserts/deletes are
+    idempotent); if it still fails it is sent to the dead-letter topic, so the
+    committed offset never stalls behind it.
+
+    With CDC_SHARDS set, batches are pipelined through the ShardedExecutor
+    instead (see process_sharded).
     """
-    async for event in events:
+    if executor is not None:
+        await process_sharded(events)
+        return
+    async for batch in events.take(BATCH_SIZE, within=BATCH_WINDOW_SECONDS):
+        # snapshot reads ('r') are treated as creates; creates/updates are applied as upserts
+        await apply_with_retry(batch)
+
+
+async def _event_batches(stream, max_size: int, within: float):
+    """Like take(), but yields un-acked Event objects so they can be acked once applied."""
+    buffer = asyncio.Queue(maxsize=max_size)
+    closed = object()
+
+    async def pump():
         try:
-            op = event.op
-            if op == 'c':
-                handler.handle_create(event.after)
-            elif op == 'u':
-                handler.handle_update(event.before, event.after)
-            elif op == 'd':
-                handler.handle_delete(event.before)
-            elif op == 'r':
-                # 'r' is a snapshot read, treat as a create
-                handler.handle_create(event.after)
+            async for event in stream.noack().events():
+                await buffer.put(event)
+        finally:
+            try:
+                buffer.put_nowait(closed)
+            except asyncio.QueueFull:
+                pass
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        finished = False
+        while not finished:
+            batch, deadline = [], None
+            while len(batch) < max_size:
+                timeout = within if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = await asyncio.wait_for(buffer.get(), timeout)
+                except asyncio.TimeoutError:
+                    if deadline is None and not pump_task.done():
+                        continue  # idle: keep waiting for the first event of the next batch
+                    finished = pump_task.done() and buffer.empty()
+                    break
+                if item is closed:
+                    finished = True
+                    break
+                batch.append(item)
+                deadline = deadline or time.monotonic() + within
+            if batch:
+                yield batch
+    finally:
+        pump_task.cancel()
+
+
+async def process_sharded(events):
+    """
+    Pipelined sharded processing: each batch is handed to the shard queues without
+    waiting for earlier batches, so a slow shard only delays its own keys (the
+    bounded queues still push back once a shard is SHARD_QUEUE_SIZE batches behind).
+
+    Offsets are acked strictly in batch order: a batch's events are acked only
+    when it and every earlier batch have fully completed, so the committed offset
+    is the highest contiguous completed batch. Slices that keep failing are sent
+    to the dead-letter topic before their batch counts as completed.
+    """
+    in_flight = deque()  # [events, done] in arrival order
+    pending = set()  # finish tasks, referenced so they are not collected mid-flight
+
+    async def finish(entry, submitted):
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(future) for future, _ in submitted), return_exceptions=True
+        )
+        for result, (_, slice_events) in zip(results, submitted):
+            if isinstance(result, Exception):
+                logging.error(f"Sending {len(slice_events)} events to {dead_letter_topic.get_topic_name()}")
+                for event in slice_events:
+                    await dead_letter_topic.send(value=event)
+        entry[1] = True
+        while in_flight and in_flight[0][1]:
+            for event in in_flight.popleft()[0]:
+                event.ack()
+
+    async for batch in _event_batches(events, BATCH_SIZE, BATCH_WINDOW_SECONDS):
+        entry = [batch, False]
+        in_flight.append(entry)
+        # blocks (off the event loop) only when a shard queue is full
+        submitted = await asyncio.to_thread(executor.submit, [event.value for event in batch])
+        task = asyncio.ensure_future(finish(entry, submitted))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    # end of stream: the last batches still need to be acked or dead-lettered
+    await asyncio.gather(*pending)
+
+
+async def apply_with_retry(batch: list):
+    for attempt in range(1, APPLY_RETRIES + 1):
+        try:
+            await asyncio.to_thread(handler.handle_batch, batch)
+            return
         except Exception as e:
-            logging.error(f"Failed to process event {event.source.get('txId')}: {e}")
-            # Optionally send to a dead-letter-queue
+            logging.error(f"Batch of {len(batch)} events failed (attempt {attempt}/{APPLY_RETRIES}): {e}")
+            if attempt < APPLY_RETRIES:
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    logging.error(f"Sending {len(batch)} events to {dead_letter_topic.get_topic_name()}")
+    for event in batch:
+        await dead_letter_topic.send(value=event)
+
+
+@app.timer(interval=30.0)
+async def report_shard_lag():
+    if executor is not None:
+        for stats in executor.lag():
+            logging.info(f"Shard lag: {stats}")
+
+
+def benchmark_shards(num_events: int = 20000, num_keys: int = 2000, apply_ms: float = 2.0):
+    """
+    In-memory stand-in for the topic: synthetic Debezium batches through 1..N shards,
+    with each shard apply sleeping `apply_ms` to simulate a slow downstream call.
+    """
+    class SlowHandler(ChangeHandler):
+        def apply_changes(self, changes: dict):
+            time.sleep(apply_ms / 1000)
+
+    now_ms = int(time.time() * 1000)
+    events = [
+        DebeziumPayload(
+            before=None, after={'id': i % num_keys, 'email': f"user{i}@example.com"},
+            source={'table': 'customers'}, op='u', ts_ms=now_ms + i,
+        )
+        for i in range(num_events)
+    ]
+    batches = [events[i:i + 500] for i in range(0, num_events, 500)]
+    for shards in (1, 2, 4, 8):
+        bench = ShardedExecutor(SlowHandler(), shards)
+        started = time.perf_counter()
+        # pipelined like process_sharded: submit everything, then wait
+        submitted = [s for batch in batches for s in bench.submit(batch)]
+        for future, _ in submitted:
+            future.result()
+        elapsed = time.perf_counter() - started
+        logging.info(f"{shards} shard(s): {num_events / elapsed:,.0f} events/s")
 
 if __name__ == "__main__":
     # Run with: faust -A cdc_app worker -l info
-    app.main()
+    # Shard scaling demo without Kafka: python cdc_app.py bench-shards
+    import sys
+    if sys.argv[1:] == ['bench-shards']:
+        benchmark_shards()
+    else:
+        app.main()
@@ -1,9 +1,31 @@
+import io
 import json
 import logging
+import queue
+import sqlite3
+import struct
+import threading
 import time
+from collections import Counter
 from confluent_kafka import Producer
 from pydantic import BaseModel, Field
-from uuid import uuid4
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple, Union
+from uuid import UUID, uuid4
+
+try:
+    import orjson
+except ImportError:  # optional fast serializer
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional compact serializer
+    msgpack = None
+
+try:
+    import fastavro
+except ImportError:  # required only by AvroEventEncoder
+    fastavro = None
 
 # ---
 # This example shows the PRODUCER side of event streaming.
@@ -13,22 +35,409 @@ from uuid import uuid4
 
 logging.basicConfig(level=logging.INFO)
 
+# Producer tuning for throughput: let librdkafka build large, compressed batches
+HIGH_THROUGHPUT_CONFIG = {
+    'linger.ms': 20,
+    'batch.size': 1_000_000,
+    'batch.num.messages': 100_000,
+    'compression.type': 'lz4',
+    'queue.buffering.max.messages': 1_000_000,
+    'queue.buffering.max.kbytes': 1_048_576,
+    'enable.idempotence': True,
+}
+
+OVERFLOW_POLICIES = ('drop_newest', 'drop_oldest', 'block', 'raise')
+
+
+def _serializer(name: str) -> Callable[[dict], bytes]:
+    if name == 'json':
+        return lambda event: json.dumps(event, separators=(',', ':')).encode('utf-8')
+    if name == 'orjson':
+        if orjson is None:
+            raise ImportError("serializer='orjson' requires the orjson package")
+        return orjson.dumps
+    if name == 'msgpack':
+        if msgpack is None:
+            raise ImportError("serializer='msgpack' requires the msgpack package")
+        return msgpack.packb
+    raise ValueError(f"Unknown serializer: {name}")
+
+
+class LocalSchemaRegistry:
+    """
+    Minimal stand-in for a Confluent-style schema registry: assigns a stable
+    integer id per distinct schema and versions schemas per subject.
+
+    Backed by SQLite so producers and consumers on one host agree on ids;
+    registration runs in an IMMEDIATE transaction, which serializes concurrent
+    registering processes. Swap for a real registry client in production.
+    """
+
+    def __init__(self, path: str = 'schema_registry.db'):
+        self.path = path
+        self._schemas: Dict[int, dict] = {}
+        self._parsed: Dict[int, Tuple[object, FrozenSet[str]]] = {}
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schemas (id INTEGER PRIMARY KEY AUTOINCREMENT, canonical TEXT UNIQUE NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS subject_versions ("
+                "subject TEXT NOT NULL, version INTEGER NOT NULL, schema_id INTEGER NOT NULL, "
+                "PRIMARY KEY (subject, version), UNIQUE (subject, schema_id))"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def register(self, subject: str, schema: dict) -> int:
+        """Returns the id of `schema`, registering it (and a new subject version) if unseen."""
+        canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")  # one registering process at a time
+        except BaseException:
+            conn.close()  # no transaction was started, nothing to roll back
+            raise
+        try:
+            row = conn.execute("SELECT id FROM schemas WHERE canonical = ?", (canonical,)).fetchone()
+            if row is not None:
+                schema_id = row[0]
+            else:
+                schema_id = conn.execute("INSERT INTO schemas (canonical) VALUES (?)", (canonical,)).lastrowid
+            conn.execute(
+                "INSERT OR IGNORE INTO subject_versions (subject, version, schema_id) "
+                "SELECT ?, COALESCE(MAX(version), 0) + 1, ? FROM subject_versions WHERE subject = ?",
+                (subject, schema_id, subject),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:  # SQLite may already have rolled back on its own
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return schema_id
+
+    def get(self, schema_id: int) -> dict:
+        schema = self._schemas.get(schema_id)
+        if schema is None:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT canonical FROM schemas WHERE id = ?", (schema_id,)).fetchone()
+            finally:
+                conn.close()
+            if row is None:
+                raise KeyError(f"Unknown schema id {schema_id}")
+            schema = self._schemas[schema_id] = json.loads(row[0])  # ids are immutable, safe to cache
+        return schema
+
+    def reader(self, schema_id: int) -> Tuple[object, FrozenSet[str]]:
+        """Parsed Avro schema for `schema_id` plus the payload fields that carry JSON text."""
+        cached = self._parsed.get(schema_id)
+        if cached is None:
+            schema = self.get(schema_id)
+            payload = next(f for f in schema['fields'] if f['name'] == 'payload')
+            json_fields = frozenset(f['name'] for f in payload['type']['fields'] if f.get('json'))
+            cached = self._parsed[schema_id] = (fastavro.parse_schema(schema), json_fields)
+        return cached
+
+
+_AVRO_TYPES = {bool: 'boolean', int: 'long', float: 'double', str: 'string', bytes: 'bytes'}
+_PRIMITIVES = (bool, int, float, str, bytes, type(None))
+
+# Wire format (Confluent-compatible): magic byte 0, 4-byte big-endian schema id, Avro body
+_HEADER = struct.Struct('>bI')
+
+
+class AvroEventEncoder:
+    """
+    Encodes events as schemaless Avro with a schema-id header.
+
+    The envelope carries a 16-byte binary event_id; the payload gets a record
+    schema per event_type (given via `register_event_type` or inferred from the
+    first payload seen, all fields nullable). A payload with a new shape
+    registers a new schema version under the same subject. Nested values
+    (dicts, lists) travel as JSON strings in fields flagged `"json": true`,
+    which `decode_event` parses back.
+    """
+
+    def __init__(self, registry: LocalSchemaRegistry, topic: str = 'application_events'):
+        if fastavro is None:
+            raise ImportError("AvroEventEncoder requires the fastavro package")
+        self.registry = registry
+        self.topic = topic
+        self._explicit: Dict[str, list] = {}
+        self._by_shape: Dict[tuple, Tuple[int, object, FrozenSet[str]]] = {}
+
+    @staticmethod
+    def _payload_field(name: str, avro_type: str) -> dict:
+        if avro_type == 'json':
+            return {'name': name, 'type': ['null', 'string'], 'default': None, 'json': True}
+        return {'name': name, 'type': ['null', avro_type], 'default': None}
+
+    def register_event_type(self, event_type: str, payload_fields: Dict[str, str]):
+        """
+        Pins the payload schema of `event_type`, e.g. {'item_id': 'string', 'quantity': 'long'};
+        use 'json' for nested values.
+        """
+        self._explicit[event_type] = [
+            self._payload_field(name, avro_type) for name, avro_type in payload_fields.items()
+        ]
+
+    def _schema_for(self, event_type: str, payload: dict) -> Tuple[int, object, FrozenSet[str]]:
+        if event_type in self._explicit:
+            shape = (event_type,)
+        else:
+            shape = (event_type,) + tuple(sorted((k, type(v).__name__) for k, v in payload.items()))
+        cached = self._by_shape.get(shape)
+        if cached is not None:
+            return cached
+
+        fields = self._explicit.get(event_type) or [
+            self._payload_field(k, _AVRO_TYPES.get(type(v), 'string' if v is None else 'json'))
+            for k, v in sorted(payload.items())
+        ]
+        record_name = ''.join(part.title() for part in event_type.split('_'))
+        schema = {
+            'type': 'record', 'name': f"{record_name}Event", 'namespace': 'events',
+            'fields': [
+                {'name': 'event_id', 'type': {'type': 'fixed', 'name': 'uuid16', 'size': 16}},
+                {'name': 'event_type', 'type': 'string'},
+                {'name': 'user_id', 'type': 'string'},
+                {'name': 'timestamp', 'type': {'type': 'long', 'logicalType': 'timestamp-millis'}},
+                {'name': 'payload', 'type': {'type': 'record', 'name': f"{record_name}Payload", 'fields': fields}},
+            ],
+        }
+        schema_id = self.registry.register(f"{self.topic}-{event_type}", schema)
+        json_fields = frozenset(f['name'] for f in fields if f.get('json'))
+        cached = self._by_shape[shape] = (schema_id, fastavro.parse_schema(schema), json_fields)
+        return cached
+
+    def encode(self, event: dict) -> bytes:
+        schema_id, parsed, json_fields = self._schema_for(event['event_type'], event['payload'])
+        payload = event['payload']
+        if json_fields:
+            payload = {k: json.dumps(v) if k in json_fields and v is not None else v
+                       for k, v in payload.items()}
+        event_id: Union[bytes, str] = event['event_id']
+        if isinstance(event_id, str):  # accept the decoded form too
+            event_id = UUID(event_id).bytes
+        buf = io.BytesIO()
+        buf.write(_HEADER.pack(0, schema_id))
+        fastavro.schemaless_writer(buf, parsed, {**event, 'event_id': event_id, 'payload': payload})
+        return buf.getvalue()
+
+
+def decode_event(value: bytes, registry: LocalSchemaRegistry) -> dict:
+    """
+    Decodes a schema-id-framed Avro event back to a dict (event_id as a UUID string,
+    JSON-carried payload fields parsed back). Parsed schemas are cached per registry.
+    For consumers such as the CDC and stream-scoring Faust agents.
+    """
+    magic, schema_id = _HEADER.unpack_from(value)
+    if magic != 0:
+        raise ValueError(f"Unknown magic byte {magic}; not a schema-registry framed message")
+    parsed, json_fields = registry.reader(schema_id)
+    event = fastavro.schemaless_reader(io.BytesIO(value[_HEADER.size:]), parsed)
+    event['event_id'] = str(UUID(bytes=event['event_id']))
+    if hasattr(event['timestamp'], 'timestamp'):  # timestamp-millis decodes to datetime
+        event['timestamp'] = int(event['timestamp'].timestamp() * 1000)
+    payload = event['payload']
+    for name in json_fields:
+        if payload.get(name) is not None:
+            payload[name] = json.loads(payload[name])
+    return event
+
+
+def faust_codec(registry: LocalSchemaRegistry, encoder: Optional[AvroEventEncoder] = None):
+    """
+    Returns a Faust codec for registry-framed events, e.g.
+    app.topic('application_events', value_serializer=faust_codec(registry)).
+    Encoding goes through `encoder` (an AvroEventEncoder on `registry` by default).
+    """
+    from faust.serializers.codecs import Codec
+
+    encoder = encoder or AvroEventEncoder(registry)
+
+    class RegistryAvroCodec(Codec):
+        def _loads(self, s: bytes) -> dict:
+            return decode_event(s, registry)
+
+        def _dumps(self, obj) -> bytes:
+            return encoder.encode(obj)
+
+    return RegistryAvroCodec()
+
+
 class EventProducer:
-    def __init__(self, bootstrap_servers='localhost:9092'):
-        """Initializes the Kafka Producer."""
+    def __init__(
+        self,
+        bootstrap_servers='localhost:9092',
+        high_throughput: bool = False,
+        serializer: str = 'json',
+        local_queue_size: int = 100_000,
+        overflow_policy: str = 'drop_newest',
+        stats_interval_seconds: float = 10.0,
+        produce_timeout_seconds: float = 5.0,
+        encoder: Optional[AvroEventEncoder] = None,
+    ):
+        """
+        Initializes the Kafka Producer.
+
+        :param high_throughput: Use batching/compression tuning and a non-blocking local queue
+                                drained by a background sender thread
+        :param serializer: 'json', 'orjson' or 'msgpack'
+        :param local_queue_size: Capacity of the local queue (high-throughput mode)
+        :param overflow_policy: What to do when the local queue is full:
+                                'drop_newest', 'drop_oldest', 'block' or 'raise'
+        :param stats_interval_seconds: How often aggregated delivery stats are logged
+        :param produce_timeout_seconds: How long a produce waits for space in librdkafka's
+                                        queue before overflow_policy applies
+        :param encoder: Optional schema-aware encoder (e.g. AvroEventEncoder); overrides `serializer`
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}")
         config = {
             'bootstrap.servers': bootstrap_servers,
             'client.id': 'my-app-producer'
         }
+        if high_throughput:
+            config.update(HIGH_THROUGHPUT_CONFIG)
         self.producer = Producer(config)
         self.topic = 'application_events'
+        self.encoder = encoder
+        self.serialize = encoder.encode if encoder is not None else _serializer(serializer)
+        self.overflow_policy = overflow_policy
+        self.stats_interval_seconds = stats_interval_seconds
+        self.produce_timeout_seconds = produce_timeout_seconds
+
+        # Aggregated delivery stats, logged every stats_interval_seconds instead of per message.
+        # Updated from delivery callbacks, the sender thread and callers, hence the lock.
+        self.stats = Counter()
+        self._errors = Counter()
+        self._stats_lock = threading.Lock()
+        self._last_stats_log = time.monotonic()
+
+        self._queue = None
+        self._stop = threading.Event()
+        if high_throughput:
+            self._queue = queue.Queue(maxsize=local_queue_size)
+            self._sender = threading.Thread(target=self._drain, name='event-producer-sender', daemon=True)
+            self._sender.start()
 
     def delivery_report(self, err, msg):
-        """Asynchronous callback for message delivery status."""
-        if err is not None:
-            logging.error(f"Message delivery failed: {err}")
-        else:
-            logging.info(f"Message delivered to {msg.topic()} [{msg.partition()}]")
+        """Asynchronous callback for message delivery status (aggregated, not logged per message)."""
+        with self._stats_lock:
+            if err is not None:
+                self.stats['failed'] += 1
+                self._errors[str(err)] += 1
+            else:
+                self.stats['delivered'] += 1
+        self._maybe_log_stats()
+
+    def _count(self, name: str, n: int = 1) -> int:
+        with self._stats_lock:
+            self.stats[name] += n
+            return self.stats[name]
+
+    def _maybe_log_stats(self, force: bool = False):
+        with self._stats_lock:
+            now = time.monotonic()
+            if not force and now - self._last_stats_log < self.stats_interval_seconds:
+                return
+            self._last_stats_log = now
+            stats, errors = dict(self.stats), dict(self._errors)
+            self._errors.clear()
+        logging.info(f"Producer stats: {stats}")
+        for err, count in errors.items():
+            logging.error(f"Message delivery failed ({count}x): {err}")
+
+    def _build_event(self, event_type: str, user_id: str, payload: dict) -> dict:
+        return {
+            'event_id': uuid4().bytes if self.encoder is not None else str(uuid4()),
+            'event_type': event_type,
+            'user_id': user_id,
+            'timestamp': int(time.time() * 1000), # Millisecond timestamp
+            'payload': payload
+        }
+
+    def _enqueue(self, item: Tuple[bytes, bytes]) -> bool:
+        """Puts a serialized (key, value) on the local queue, applying the overflow policy."""
+        try:
+            if self.overflow_policy == 'block':
+                self._queue.put(item)
+            else:
+                self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            if self.overflow_policy == 'raise':
+                raise BufferError("Local event queue is full")
+            if self.overflow_policy == 'drop_oldest':
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._count('dropped_oldest')
+                return self._enqueue(item)
+            self._count('dropped_newest')
+            return False
+
+    def _drain(self):
+        """Sender thread: moves events from the local queue into librdkafka, off the request path."""
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                key, value = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                self.producer.poll(0)
+                continue
+            self._produce(key, value)
+            if self._count('sent') % 1000 == 0:
+                self.producer.poll(0)
+
+    def _produce(self, key: bytes, value: bytes) -> bool:
+        """
+        Hands one message to librdkafka; when its queue is full, serves delivery callbacks
+        until space frees up. After produce_timeout_seconds (e.g. broker unreachable) the
+        overflow policy decides: 'block' keeps waiting, 'raise' raises BufferError, the
+        drop policies drop this message and return False.
+        """
+        deadline = time.monotonic() + self.produce_timeout_seconds
+        while True:
+            try:
+                self.producer.produce(self.topic, key=key, value=value, callback=self.delivery_report)
+                return True
+            except BufferError:
+                if self.overflow_policy != 'block' and time.monotonic() >= deadline:
+                    if self.overflow_policy == 'raise':
+                        raise BufferError("Producer queue still full after produce_timeout_seconds")
+                    self._count('dropped_producer_full')
+                    return False
+                self.producer.poll(0.05)
+
+    def produce_many(self, events: Iterable[Tuple[str, str, dict]]) -> int:
+        """
+        Bulk API: builds, serializes and sends many events with a single poll.
+
+        :param events: Iterable of (event_type, user_id, payload)
+        :return: Number of events accepted (overflow may drop some in high-throughput mode)
+        """
+        accepted = 0
+        for event_type, user_id, payload in events:
+            key = user_id.encode('utf-8')
+            value = self.serialize(self._build_event(event_type, user_id, payload))
+            if self._queue is not None:
+                accepted += self._enqueue((key, value))
+                continue
+            accepted += self._produce(key, value)
+        if self._queue is None:
+            self.producer.poll(0)
+        return accepted
 
     def produce_event(self, event_type: str, user_id: str, payload: dict):
         """
@@ -38,47 +447,73 @@ class EventProducer:
         :param user_id: The user associated with the event
         :param payload: A dictionary of event-specific data
         """
-        event = {
-            'event_id': str(uuid4()),
-            'event_type': event_type,
-            'user_id': user_id,
-            'timestamp': int(time.time() * 1000), # Millisecond timestamp
-            'payload': payload
-        }
-        
+        event = self._build_event(event_type, user_id, payload)
+
+        if self._queue is not None:
+            # Non-blocking (unless overflow_policy='block'): the sender thread does the produce
+            self._enqueue((user_id.encode('utf-8'), self.serialize(event)))
+            return
+
         try:
             # Send the message asynchronously.
             # The key (user_id) ensures all events for a user go to the same partition.
-            self.producer.produce(
-                self.topic,
-                key=user_id.encode('utf-8'),
-                value=json.dumps(event).encode('utf-8'),
-                callback=self.delivery_report
-            )
+            # A full librdkafka queue is drained with poll(), not a blocking flush.
+            self._produce(user_id.encode('utf-8'), self.serialize(event))
             # poll(0) is non-blocking and triggers callback delivery
             self.producer.poll(0)
-            
+
         except BufferError:
-            logging.error("Local producer queue is full. Flushing...")
-            self.producer.flush(5) # Wait up to 5s
-            # Retry producing
-            self.producer.produce(
-                self.topic,
-                key=user_id.encode('utf-8'),
-                value=json.dumps(event).encode('utf-8'),
-                callback=self.delivery_report
-            )
+            raise  # overflow_policy='raise'
         except Exception as e:
             logging.error(f"Failed to produce event: {e}")
 
     def shutdown(self):
         """Flush all outstanding messages before shutting down."""
         logging.info("Flushing remaining messages...")
+        if self._queue is not None:
+            self._stop.set()
+            self._sender.join()
         self.producer.flush()
+        self._maybe_log_stats(force=True)
 
 
 # --- Example Usage (e.g., inside your web application) ---
 if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:2] == ['bench']:
+        # Throughput check against a local broker: python producer.py bench [n_events]
+        n_events = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+        producer = EventProducer(
+            high_throughput=True,
+            serializer='orjson' if orjson is not None else 'json',
+            local_queue_size=200_000,
+            overflow_policy='block',
+        )
+        started = time.perf_counter()
+        chunk = 10_000
+        for start in range(0, n_events, chunk):
+            producer.produce_many(
+                ('page_view', f"u-{i % 50_000}", {'path': '/home', 'ms': i % 1000})
+                for i in range(start, min(start + chunk, n_events))
+            )
+        producer.shutdown()
+        elapsed = time.perf_counter() - started
+        print(f"{n_events} events in {elapsed:.2f}s ({n_events / elapsed:,.0f} events/s), stats={dict(producer.stats)}")
+        sys.exit(0)
+
+    if sys.argv[1:2] == ['size']:
+        # Compare wire size of the JSON and Avro encodings: python producer.py size
+        encoder = AvroEventEncoder(LocalSchemaRegistry())
+        encoder.register_event_type('add_to_cart', {'item_id': 'string', 'quantity': 'long'})
+        event = {'event_id': uuid4().bytes, 'event_type': 'add_to_cart', 'user_id': 'u-12345',
+                 'timestamp': int(time.time() * 1000), 'payload': {'item_id': 'item-abc', 'quantity': 2}}
+        encoded = encoder.encode(event)
+        as_json = _serializer('json')({**event, 'event_id': str(UUID(bytes=event['event_id']))})
+        print(f"json: {len(as_json)} bytes, avro: {len(encoded)} bytes")
+        print(decode_event(encoded, encoder.registry))
+        sys.exit(0)
+
     producer = EventProducer()
     
     try:
@@ -1,11 +1,14 @@
 import pandas as pd
+import json
 import logging
 import argparse
 import s3fs
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
-from sqlalchemy import create_engine
-from datetime import date
+from sqlalchemy import bindparam, create_engine, text
+from datetime import date, datetime, time, timedelta
+from uuid import uuid4
 
 # ---
 # This example shows a modular ETL job, runnable via a scheduler (e.g., Airflow).
@@ -15,44 +18,173 @@ from datetime import date
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Source tables tracked for incremental loads: table -> (watermark column, user key column).
+# The watermark column must be indexed and monotonic for changed rows
+# (an `updated_at` timestamp or an ever-increasing id).
+WATERMARK_COLUMNS = {
+    "users": ("updated_at", "id"),
+    "orders": ("updated_at", "user_id"),
+}
+
+BASE_QUERY = """
+    SELECT 
+        u.id as user_id, 
+        u.email, 
+        u.created_at, 
+        o.id as order_id, 
+        o.order_total, 
+        o.created_at as order_timestamp
+    FROM users u
+    LEFT JOIN orders o ON u.id = o.user_id
+"""
+
+# Half-open ranges instead of DATE(col) = ... so the created_at indexes are usable
+DAY_PREDICATE = """
+    ((u.created_at >= :day_start AND u.created_at < :day_end)
+     OR (o.created_at >= :day_start AND o.created_at < :day_end))
+"""
+
+# Streaming path: explicit schema so every record batch (and row group) agrees
+RAW_SCHEMA = pa.schema([
+    ("user_id", pa.int64()),
+    ("email", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("order_id", pa.int64()),
+    ("order_total", pa.float64()),
+    ("order_timestamp", pa.timestamp("us")),
+])
+
+# Mergeable partial aggregates: (state column, aggregation used to combine it)
+PARTIAL_AGGS = [
+    ("email", "first"),
+    ("user_created_at", "first"),
+    ("total_order_value", "sum"),
+    ("total_orders", "sum"),
+]
+SUMMARY_COLUMNS = ["user_id"] + [col for col, _ in PARTIAL_AGGS]
+
 class DailyUserETL:
-    def __init__(self, source_db_conn_str: str, dest_s3_bucket: str):
+    def __init__(self, source_db_conn_str: str, dest_s3_bucket: str, key_batch_size: int = 10_000):
         """
         Initializes the ETL job with source and destination.
         
         :param source_db_conn_str: SQLAlchemy connection string for the source DB
         :param dest_s3_bucket: S3 bucket name (e.g., 'my-data-lake')
+        :param key_batch_size: Page size for keyset scans over changed rows
         """
         try:
             self.source_engine = create_engine(source_db_conn_str)
             self.s3fs = s3fs.S3FileSystem()
             self.dest_bucket = dest_s3_bucket
+            self.key_batch_size = key_batch_size
             logging.info("ETL Job initialized.")
         except Exception as e:
             logging.error(f"Failed to initialize ETL job: {e}")
             raise
 
+    @staticmethod
+    def _day_range(execution_date: date) -> dict:
+        day_start = datetime.combine(execution_date, time.min)
+        return {"day_start": day_start, "day_end": day_start + timedelta(days=1)}
+
     def extract(self, execution_date: date) -> pd.DataFrame:
         """Pulls raw data from the source operational database."""
-        query = f"""
-        SELECT 
-            u.id as user_id, 
-            u.email, 
-            u.created_at, 
-            o.id as order_id, 
-            o.order_total, 
-            o.created_at as order_timestamp
-        FROM users u
-        LEFT JOIN orders o ON u.id = o.user_id
-        WHERE DATE(u.created_at) = '{execution_date.isoformat()}'
-           OR DATE(o.created_at) = '{execution_date.isoformat()}'
-        """
+        query = text(BASE_QUERY + " WHERE " + DAY_PREDICATE)
         logging.info(f"Extracting data for date: {execution_date}")
         with self.source_engine.connect() as conn:
-            data = pd.read_sql(query, conn)
+            data = pd.read_sql(query, conn, params=self._day_range(execution_date))
         logging.info(f"Extracted {len(data)} raw records.")
         return data
 
+    # --- Incremental (watermark-based) extraction ---
+
+    def _watermark_path(self, execution_date: date) -> str:
+        return self._partition_dir(execution_date) + "/_watermarks.json"
+
+    def _read_watermarks(self, execution_date: date) -> dict:
+        """High-water marks recorded when this partition was last built ({} if never)."""
+        path = self._watermark_path(execution_date)
+        if not self.s3fs.exists(path):
+            return {}
+        with self.s3fs.open(path, "r") as f:
+            return json.load(f)
+
+    def _write_watermarks(self, execution_date: date, marks: dict) -> None:
+        with self.s3fs.open(self._watermark_path(execution_date), "w") as f:
+            json.dump(marks, f, default=str)
+
+    def _current_watermarks(self, conn) -> dict:
+        """Snapshot upper bounds; rows changing during the run are picked up next time."""
+        marks = {}
+        for table, (wm_col, _) in WATERMARK_COLUMNS.items():
+            marks[table] = conn.execute(text(f"SELECT MAX({wm_col}) FROM {table}")).scalar()
+        return marks
+
+    def _changed_user_ids(self, conn, table: str, low, high) -> set:
+        """
+        Keyset-scan rows with low < watermark <= high, ordered by (watermark, id),
+        so every page is an index range seek rather than an OFFSET scan.
+        """
+        wm_col, user_col = WATERMARK_COLUMNS[table]
+        user_ids, cursor = set(), None  # cursor = (wm, id) of the previous page's last row
+        while True:
+            where = [f"{wm_col} <= :high"]
+            params = {"high": high, "limit": self.key_batch_size}
+            if cursor is not None:
+                where.append(f"({wm_col} > :last_wm OR ({wm_col} = :last_wm AND id > :last_id))")
+                params.update(last_wm=cursor[0], last_id=cursor[1])
+            elif low is not None:
+                where.append(f"{wm_col} > :low")
+                params["low"] = low
+            query = text(f"""
+                SELECT {wm_col} AS wm, id, {user_col} AS user_id FROM {table}
+                WHERE {' AND '.join(where)}
+                ORDER BY {wm_col}, id
+                LIMIT :limit
+            """)
+            rows = conn.execute(query, params).fetchall()
+            user_ids.update(r.user_id for r in rows if r.user_id is not None)
+            if len(rows) < self.key_batch_size:
+                return user_ids
+            cursor = (rows[-1].wm, rows[-1].id)
+
+    def extract_incremental(self, execution_date: date):
+        """
+        Pulls only users whose rows changed since this partition's stored watermarks.
+
+        :return: (raw rows for the changed users, changed user ids, new watermarks),
+                 or (None, None, new watermarks) when no watermark exists yet and a
+                 full extract of the partition is required.
+        """
+        previous = self._read_watermarks(execution_date)
+        with self.source_engine.connect() as conn:
+            current = self._current_watermarks(conn)
+            if not previous:
+                logging.info(f"No watermarks for {execution_date}; falling back to full extract.")
+                return None, None, current
+
+            changed = set()
+            for table in WATERMARK_COLUMNS:
+                low, high = previous.get(table), current[table]
+                if high is None or (low is not None and str(high) == str(low)):
+                    continue  # nothing new in this table since the last build
+                changed |= self._changed_user_ids(conn, table, low, high)
+            logging.info(f"{len(changed)} users changed since last build of {execution_date}.")
+            if not changed:
+                return pd.DataFrame(), changed, current
+
+            query = text(BASE_QUERY + " WHERE u.id IN :ids AND " + DAY_PREDICATE).bindparams(
+                bindparam("ids", expanding=True)
+            )
+            ids = sorted(changed)
+            chunks = []
+            for i in range(0, len(ids), self.key_batch_size):
+                params = dict(self._day_range(execution_date), ids=ids[i:i + self.key_batch_size])
+                chunks.append(pd.read_sql(query, conn, params=params))
+        data = pd.concat(chunks, ignore_index=True)
+        logging.info(f"Extracted {len(data)} raw records for changed users.")
+        return data, changed, current
+
     def transform(self, raw_data: pd.DataFrame, execution_date: date) -> pd.DataFrame:
         """Applies business logic and cleaning to the raw data."""
         if raw_data.empty:
@@ -78,6 +210,12 @@ class DailyUserETL:
         logging.info(f"Transformed data into {len(daily_summary)} summary records.")
         return daily_summary
 
+    def _partition_dir(self, execution_date: date) -> str:
+        year = execution_date.year
+        month = execution_date.month
+        day = execution_date.day
+        return f"{self.dest_bucket}/users/daily_summary/year={year}/month={month}/day={day}"
+
     def load(self, transformed_data: pd.DataFrame, execution_date: date) -> str:
         """Loads the transformed data into the destination (S3/Data Lake)."""
         if transformed_data.empty:
@@ -85,10 +223,7 @@ class DailyUserETL:
             return None
             
         # Define output path with date partitioning
-        year = execution_date.year
-        month = execution_date.month
-        day = execution_date.day
-        output_path = f"{self.dest_bucket}/users/daily_summary/year={year}/month={month}/day={day}/data.parquet"
+        output_path = f"{self._partition_dir(execution_date)}/data.parquet"
         
         logging.info(f"Loading data to {output_path}...")
         
@@ -100,17 +235,170 @@ class DailyUserETL:
         logging.info("Load complete.")
         return output_path
 
-    def run(self, execution_date: date):
+    def merge(self, transformed_data: pd.DataFrame, changed_user_ids: set, execution_date: date) -> str:
+        """Replaces the changed users' rows in the existing daily partition."""
+        output_path = f"{self._partition_dir(execution_date)}/data.parquet"
+        if self.s3fs.exists(output_path):
+            with self.s3fs.open(output_path, 'rb') as f:
+                existing = pq.read_table(f).to_pandas()
+            existing = existing[~existing['user_id'].isin(changed_user_ids)]
+            transformed_data = pd.concat([existing, transformed_data], ignore_index=True)
+        logging.info(f"Merging {len(changed_user_ids)} changed users into {output_path}...")
+        return self.load(transformed_data, execution_date)
+
+    def run(self, execution_date: date, incremental: bool = False, streaming: bool = False):
         """Orchestrates the full E-T-L process."""
         try:
-            raw_df = self.extract(execution_date)
-            transformed_df = self.transform(raw_df, execution_date)
-            load_path = self.load(transformed_df, execution_date)
+            if streaming:
+                load_path = self.run_streaming(execution_date)
+            elif incremental:
+                load_path = self._run_incremental(execution_date)
+            else:
+                raw_df = self.extract(execution_date)
+                transformed_df = self.transform(raw_df, execution_date)
+                load_path = self.load(transformed_df, execution_date)
             logging.info(f"ETL run successful for {execution_date}. Output: {load_path}")
         except Exception as e:
             logging.error(f"ETL run failed for {execution_date}: {e}")
             raise
 
+    def _run_incremental(self, execution_date: date) -> str:
+        """Incremental run (also used for cheap backfills): only changed users are re-read."""
+        raw_df, changed, marks = self.extract_incremental(execution_date)
+        if raw_df is None:
+            raw_df = self.extract(execution_date)
+            load_path = self.load(self.transform(raw_df, execution_date), execution_date)
+        elif not changed:
+            logging.info(f"Partition {execution_date} is up to date.")
+            load_path = f"{self._partition_dir(execution_date)}/data.parquet"
+        else:
+            load_path = self.merge(self.transform(raw_df, execution_date), changed, execution_date)
+        # Watermarks are written last, so a failed run is simply retried from the old marks
+        self._write_watermarks(execution_date, marks)
+        return load_path
+
+    # --- Streaming (Arrow-native, bounded-memory) path ---
+
+    def _iter_record_batches(self, execution_date: date, batch_size: int):
+        """
+        Streams the day's rows ordered by user_id as Arrow record batches
+        through a server-side cursor (one connection, no full materialization).
+
+        Each fetchmany() page is transposed into columns and every column is
+        cast explicitly to RAW_SCHEMA (e.g. NUMERIC order totals arrive as
+        Decimal and become float64).
+        """
+        query = text(BASE_QUERY + " WHERE " + DAY_PREDICATE + " ORDER BY u.id")
+        with self.source_engine.connect().execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        ) as conn:
+            result = conn.execute(query, self._day_range(execution_date))
+            positions = [list(result.keys()).index(name) for name in RAW_SCHEMA.names]
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                yield pa.RecordBatch.from_arrays(
+                    [pc.cast(pa.array(columns[i]), field.type, safe=False)
+                     for i, field in zip(positions, RAW_SCHEMA)],
+                    schema=RAW_SCHEMA,
+                )
+
+    @staticmethod
+    def _partial_aggregate(table: pa.Table) -> pa.Table:
+        """
+        Per-user partial aggregates. The state (first email/created_at, sum, count)
+        is mergeable: re-aggregating partials gives the same result as one pass.
+        """
+        grouped = table.group_by("user_id", use_threads=False).aggregate(PARTIAL_AGGS)
+        grouped = grouped.select(["user_id"] + [f"{col}_{agg}" for col, agg in PARTIAL_AGGS])
+        return grouped.rename_columns(SUMMARY_COLUMNS).sort_by("user_id")
+
+    @staticmethod
+    def _to_partial(batch: pa.RecordBatch) -> pa.Table:
+        """Maps raw joined rows onto the partial-aggregate state columns."""
+        return pa.table({
+            "user_id": batch.column("user_id"),
+            "email": batch.column("email"),
+            "user_created_at": batch.column("created_at"),
+            "total_order_value": pc.fill_null(batch.column("order_total"), 0.0),
+            # one joined row per order id, so a valid-count equals nunique(order_id)
+            "total_orders": pc.cast(pc.is_valid(batch.column("order_id")), pa.int64()),
+        })
+
+    def run_streaming(self, execution_date: date, batch_size: int = 50_000) -> str:
+        """
+        Extract -> aggregate -> write, one record batch at a time.
+
+        Rows arrive ordered by user_id, so every user except the last one in a
+        batch is final and is written as a row group; only that last user's
+        partial state is carried over. Memory is bounded by batch_size.
+
+        Row groups go to a temporary key (closing an s3fs file commits it), which
+        replaces data.parquet only once the whole stream succeeded; on error it is
+        deleted and the existing partition is left untouched.
+        """
+        output_path = f"{self._partition_dir(execution_date)}/data.parquet"
+        # leading underscore: dataset readers skip the key while it is being written
+        tmp_path = f"{self._partition_dir(execution_date)}/_tmp-{uuid4().hex}.parquet"
+        sink, writer, carry, rows_in, rows_out = None, None, None, 0, 0
+
+        def write(done: pa.Table):
+            nonlocal sink, writer, rows_out
+            if done.num_rows == 0:
+                return
+            done = done.append_column("load_date", pa.array([execution_date] * done.num_rows, pa.date32()))
+            if writer is None:
+                sink = self.s3fs.open(tmp_path, 'wb')
+                writer = pq.ParquetWriter(sink, done.schema, compression='snappy')
+            writer.write_table(done)
+            rows_out += done.num_rows
+
+        logging.info(f"Streaming data for date {execution_date} to {output_path}...")
+        try:
+            for batch in self._iter_record_batches(execution_date, batch_size):
+                if batch.num_rows == 0:
+                    continue
+                rows_in += batch.num_rows
+                partial = self._partial_aggregate(self._to_partial(batch))
+                if carry is not None:
+                    partial = self._partial_aggregate(pa.concat_tables([carry, partial]))
+                carry = partial.slice(partial.num_rows - 1)
+                write(partial.slice(0, partial.num_rows - 1))
+            if carry is not None:
+                write(carry)
+            if writer is not None:
+                try:
+                    writer.close()
+                finally:
+                    sink.close()
+                self.s3fs.mv(tmp_path, output_path)
+        except BaseException:
+            self._discard_upload(writer, sink, tmp_path)
+            raise
+
+        if writer is None:
+            logging.warning("No data to load.")
+            return None
+        logging.info(f"Streamed {rows_in} raw records into {rows_out} summary records.")
+        return output_path
+
+    def _discard_upload(self, writer, sink, tmp_path: str) -> None:
+        """Best-effort cleanup of a failed streaming write; never masks the original error."""
+        for close in (getattr(writer, "close", None), getattr(sink, "close", None)):
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception:
+                pass
+        try:
+            if self.s3fs.exists(tmp_path):
+                self.s3fs.rm(tmp_path)
+        except Exception as e:
+            logging.warning(f"Could not remove temporary upload {tmp_path}: {e}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Daily User ETL Job")
     parser.add_argument(
@@ -121,6 +409,16 @@ if __name__ == "__main__":
     # In a real app, DB/S3 details would come from env vars or a config service
     parser.add_argument("--db-conn", required=True, help="Source DB connection string")
     parser.add_argument("--s3-bucket", required=True, help="Destination S3 bucket")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-read users changed since the partition's last watermarks"
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Stream record batches to Parquet row groups with bounded memory"
+    )
     
     args = parser.parse_args()
     
@@ -130,4 +428,4 @@ if __name__ == "__main__":
         source_db_conn_str=args.db_conn,
         dest_s3_bucket=args.s3_bucket
     )
-    job.run(exec_date)
+    job.run(exec_date, incremental=args.incremental, streaming=args.streaming)
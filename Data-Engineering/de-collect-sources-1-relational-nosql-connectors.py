@@ -1,46 +1,386 @@
 import logging
+import queue
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from decimal import Decimal
 import pandas as pd
+import pyarrow as pa
+from bson import Decimal128, Int64, ObjectId
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from sqlalchemy import create_engine, text
 from pymongo import MongoClient, errors
-from typing import Any, Dict, List, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Generator, Optional, Sequence, Tuple, Union
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Snapshot-style isolation for keyset scans, per dialect; others run at their default level
+KEYSET_ISOLATION_LEVELS = {
+    "postgresql": "REPEATABLE READ",
+    "mysql": "REPEATABLE READ",
+    "mariadb": "REPEATABLE READ",
+    "mssql": "REPEATABLE READ",
+    "oracle": "SERIALIZABLE",
+    "sqlite": "SERIALIZABLE",
+}
+
+# NUMERIC/DECIMAL columns are normalised to one type so every page of a scan shares a schema;
+# pyarrow would otherwise size precision/scale from each page's own values
+ARROW_DECIMAL_TYPE = pa.decimal128(38, 18)
+
+
+def stream_concurrently(
+    producers: Sequence[Callable[[], Iterator[Any]]],
+    max_workers: int,
+    ordered: bool = False,
+    prefetch: int = 4,
+    thread_name_prefix: str = "extract",
+) -> Generator[Any, None, None]:
+    """
+    Runs each producer (a callable returning an iterator) on a bounded thread
+    pool and fans the items in to the caller.
+
+    Items flow through bounded queues, so workers block when the consumer falls
+    behind (backpressure). With `ordered=True` each producer gets its own queue
+    and producers are drained in order; otherwise items arrive as produced.
+    Closing the generator stops all workers.
+    """
+    if not producers:
+        return
+    queues = [queue.Queue(maxsize=prefetch) for _ in range(len(producers) if ordered else 1)]
+    stop = threading.Event()
+
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(idx: int):
+        q = queues[idx if ordered else 0]
+        try:
+            for item in producers[idx]():
+                if not put(q, (idx, item)):
+                    return
+            put(q, (idx, None))
+        except Exception as e:
+            put(q, (idx, e))
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+    try:
+        for idx in range(len(producers)):
+            pool.submit(worker, idx)
+
+        remaining, current = len(producers), 0
+        while remaining:
+            _, item = queues[current if ordered else 0].get()
+            if isinstance(item, Exception):
+                raise item
+            if item is None:
+                remaining -= 1
+                current += 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
 class SqlConnector:
     """Handles connection and paginated querying for relational databases."""
     
-    def __init__(self, db_conn_str: str):
+    def __init__(self, db_conn_str: str, pool_size: Optional[int] = None, max_overflow: Optional[int] = None):
+        # pool sizing only applies to QueuePool dialects; SQLite's pools reject these arguments
+        pool_args = {}
+        if pool_size is not None:
+            pool_args["pool_size"] = pool_size
+        if max_overflow is not None:
+            pool_args["max_overflow"] = max_overflow
         try:
-            self.engine = create_engine(db_conn_str)
+            self.engine = create_engine(db_conn_str, **pool_args)
+            self.last_extract_stats: List[Dict[str, Any]] = []
             logging.info("SQLAlchemy engine created successfully.")
         except Exception as e:
             logging.error(f"Failed to create SQLAlchemy engine: {e}")
             raise
 
-    def query_paginated(self, query: str, page_size: int = 1000) -> Generator[pd.DataFrame, None, None]:
+    def query_paginated(
+        self,
+        query: str,
+        page_size: int = 1000,
+        mode: str = "offset",
+        order_key: Optional[Union[str, Sequence[str]]] = None,
+        output: str = "pandas",
+        params: Optional[Dict[str, Any]] = None,
+        isolation_level: Optional[str] = None,
+    ) -> Generator[Union[pd.DataFrame, pa.Table], None, None]:
         """
-        Executes a large query in chunks using OFFSET/LIMIT.
-        Yields DataFrames page by page to conserve memory.
+        Executes a large query in chunks, yielding page by page to conserve memory.
+
+        Modes:
+          - "offset": LIMIT/OFFSET, a new connection per page (legacy; O(n^2) scanned rows).
+          - "keyset": seek pagination on `order_key` (WHERE key > last ORDER BY key LIMIT n)
+                      over one snapshot-isolated connection; flat page time, consistent snapshot.
+          - "cursor": one server-side cursor (stream_results / yield_per) for the whole scan.
+
+        :param order_key: Unique ordering column(s), required for keyset mode
+        :param output: "pandas" for DataFrames or "arrow" for pyarrow Tables
+        :param isolation_level: Keyset transaction isolation; defaults to the dialect's
+                                entry in KEYSET_ISOLATION_LEVELS
         """
+        if mode == "offset":
+            pages = self._offset_pages(query, page_size, params)
+        elif mode == "keyset":
+            if not order_key:
+                raise ValueError("keyset pagination requires an order_key")
+            keys = [order_key] if isinstance(order_key, str) else list(order_key)
+            pages = self._keyset_pages(query, page_size, keys, params, isolation_level)
+        elif mode == "cursor":
+            pages = self._cursor_pages(query, page_size, params)
+        else:
+            raise ValueError(f"Unsupported pagination mode: {mode}")
+
+        schema = None
+        for columns, rows in pages:
+            chunk = self._to_chunk(columns, rows, output, schema)
+            if output == "arrow":
+                schema = chunk.schema
+            yield chunk
+
+    def _offset_pages(self, query: str, page_size: int, params: Optional[Dict[str, Any]]):
         offset = 0
         while True:
             paginated_query = f"{query} LIMIT {page_size} OFFSET {offset}"
             logging.info(f"Executing query with OFFSET {offset}...")
             try:
                 with self.engine.connect() as conn:
-                    df = pd.read_sql(text(paginated_query), conn)
+                    result = conn.execute(text(paginated_query), params or {})
+                    columns, rows = list(result.keys()), result.fetchall()
                 
-                if df.empty:
+                if not rows:
                     logging.info("Query finished, no more data.")
                     break
                 
-                yield df
+                yield columns, rows
                 offset += page_size
                 
             except Exception as e:
                 logging.error(f"Error during paginated query: {e}")
                 raise
 
+    def _keyset_pages(
+        self,
+        query: str,
+        page_size: int,
+        keys: List[str],
+        params: Optional[Dict[str, Any]],
+        isolation_level: Optional[str] = None,
+    ):
+        order_by = ", ".join(f"q.{k}" for k in keys)
+        # Row-value comparison (a, b) > (:a, :b) keeps composite keys index-friendly
+        seek = f"({order_by}) > ({', '.join(f':seek_{i}' for i in range(len(keys)))})"
+        first_page = text(f"SELECT * FROM ({query}) AS q ORDER BY {order_by} LIMIT :page_limit")
+        next_page = text(f"SELECT * FROM ({query}) AS q WHERE {seek} ORDER BY {order_by} LIMIT :page_limit")
+
+        isolation_level = isolation_level or KEYSET_ISOLATION_LEVELS.get(self.engine.dialect.name)
+        options = {"isolation_level": isolation_level} if isolation_level else {}
+
+        pages = 0
+        try:
+            with self.engine.connect().execution_options(**options) as conn:
+                with conn.begin():
+                    stmt, bind = first_page, dict(params or {}, page_limit=page_size)
+                    while True:
+                        result = conn.execute(stmt, bind)
+                        columns, rows = list(result.keys()), result.fetchall()
+                        if not rows:
+                            break
+                        pages += 1
+                        yield columns, rows
+                        if len(rows) < page_size:
+                            break
+                        last = rows[-1]._mapping
+                        stmt = next_page
+                        bind = dict(params or {}, page_limit=page_size)
+                        bind.update({f"seek_{i}": last[k] for i, k in enumerate(keys)})
+        except Exception as e:
+            logging.error(f"Error during keyset pagination: {e}")
+            raise
+        logging.info(f"Keyset scan finished after {pages} pages.")
+
+    def _cursor_pages(self, query: str, page_size: int, params: Optional[Dict[str, Any]]):
+        try:
+            with self.engine.connect().execution_options(stream_results=True, yield_per=page_size) as conn:
+                result = conn.execute(text(query), params or {})
+                columns = list(result.keys())
+                for rows in result.partitions(page_size):
+                    yield columns, rows
+        except Exception as e:
+            logging.error(f"Error during server-side cursor scan: {e}")
+            raise
+        logging.info("Server-side cursor scan finished.")
+
+    def parallel_extract(
+        self,
+        query: str,
+        partition_column: str,
+        num_partitions: int = 8,
+        max_workers: int = 4,
+        ordered: bool = False,
+        bounds: str = "minmax",
+        sample_fraction: float = 0.01,
+        batch_size: int = 50_000,
+        prefetch: int = 4,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Generator[pa.Table, None, None]:
+        """
+        Splits `query` into key ranges on `partition_column` and streams the
+        partitions concurrently over pooled connections as Arrow tables.
+
+        :param bounds: "minmax" (equal-width ranges from MIN/MAX; numeric keys only) or
+                       "histogram" (equal-depth ranges from NTILE boundaries over a
+                       random sample; resists skew, works for any orderable key)
+        :param sample_fraction: Fraction of rows sampled for "histogram" boundaries
+        :param ordered: Yield partitions in key order; otherwise as batches arrive
+        :param prefetch: Batches buffered per queue before workers block (backpressure)
+
+        Rows with a NULL key are read by the first partition.
+        Per-partition timing and row counts land in `self.last_extract_stats`.
+        Keep max_workers <= pool_size + max_overflow.
+        """
+        ranges = self._partition_ranges(query, partition_column, num_partitions, bounds, params, sample_fraction)
+        self.last_extract_stats = [
+            {"partition": i, "lo": lo, "hi": hi, "rows": 0, "batches": 0, "seconds": None}
+            for i, (lo, hi, _) in enumerate(ranges)
+        ]
+        if not ranges:
+            return
+
+        def partition(idx: int, lo, hi, last: bool):
+            stats = self.last_extract_stats[idx]
+            started = time.perf_counter()
+            upper = "<=" if last else "<"
+            predicate = f"q.{partition_column} >= :part_lo AND q.{partition_column} {upper} :part_hi"
+            if idx == 0:
+                # range predicates never match NULL keys; the first partition picks them up
+                predicate = f"({predicate}) OR q.{partition_column} IS NULL"
+            part_query = f"SELECT * FROM ({query}) AS q WHERE {predicate}"
+            schema = None
+            try:
+                for columns, rows in self._cursor_pages(part_query, batch_size, dict(params or {}, part_lo=lo, part_hi=hi)):
+                    stats["rows"] += len(rows)
+                    stats["batches"] += 1
+                    chunk = self._to_chunk(columns, rows, "arrow", schema)
+                    schema = chunk.schema
+                    yield chunk
+            finally:
+                stats["seconds"] = round(time.perf_counter() - started, 3)
+
+        producers = [
+            lambda idx=idx, lo=lo, hi=hi, last=last: partition(idx, lo, hi, last)
+            for idx, (lo, hi, last) in enumerate(ranges)
+        ]
+        yield from stream_concurrently(producers, max_workers, ordered, prefetch, "sql-extract")
+
+        rows = [s["rows"] for s in self.last_extract_stats]
+        logging.info(
+            f"Parallel extract finished: {sum(rows)} rows in {len(rows)} partitions "
+            f"(min {min(rows)}, max {max(rows)} rows per partition)."
+        )
+
+    def _partition_ranges(
+        self,
+        query: str,
+        column: str,
+        num_partitions: int,
+        bounds: str,
+        params: Optional[Dict[str, Any]],
+        sample_fraction: float = 0.01,
+    ) -> List[Tuple[Any, Any, bool]]:
+        """Returns [(lo, hi, is_last)] covering the key range of `query`."""
+        if bounds not in ("minmax", "histogram"):
+            raise ValueError(f"Unsupported bounds strategy: {bounds}")
+        with self.engine.connect() as conn:
+            lo, hi = conn.execute(
+                text(f"SELECT MIN(q.{column}), MAX(q.{column}) FROM ({query}) AS q"), params or {}
+            ).one()
+            if lo is None:
+                # no non-NULL keys: one partition still has to read the NULL-keyed rows
+                return [(None, None, True)]
+            if bounds == "minmax":
+                if isinstance(lo, bool) or not isinstance(lo, (int, float, Decimal)):
+                    raise TypeError(
+                        f"minmax bounds need a numeric partition column, '{column}' is "
+                        f"{type(lo).__name__}; use bounds='histogram'"
+                    )
+                edges = [lo + (hi - lo) * i // num_partitions for i in range(num_partitions)] + [hi]
+            else:
+                # NTILE over a random sample gives approximate equal-depth buckets
+                # without sorting the whole result set
+                sampled = conn.execute(
+                    text(
+                        f"SELECT MIN(t.k) FROM ("
+                        f"  SELECT s.k, NTILE(:n_parts) OVER (ORDER BY s.k) AS bucket FROM ("
+                        f"    SELECT q.{column} AS k FROM ({query}) AS q"
+                        f"    WHERE q.{column} IS NOT NULL AND {self._random_expr()} < :sample_fraction"
+                        f"  ) AS s"
+                        f") AS t GROUP BY t.bucket ORDER BY 1"
+                    ),
+                    dict(params or {}, n_parts=num_partitions, sample_fraction=sample_fraction),
+                )
+                # the sample rarely contains the true extremes, so pin both ends
+                edges = [lo] + [row[0] for row in sampled if lo < row[0] < hi] + [hi]
+
+        # de-duplicate edges (tiny or heavily repeated key ranges)
+        edges = [e for i, e in enumerate(edges) if i == 0 or e != edges[i - 1]]
+        if len(edges) == 1:
+            return [(edges[0], edges[0], True)]
+        return [(edges[i], edges[i + 1], i == len(edges) - 2) for i in range(len(edges) - 1)]
+
+    def _random_expr(self) -> str:
+        """Dialect-specific uniform random value in [0, 1)."""
+        dialect = self.engine.dialect.name
+        if dialect in ("mysql", "mariadb"):
+            return "RAND()"
+        if dialect == "mssql":
+            return "RAND(CHECKSUM(NEWID()))"
+        if dialect == "oracle":
+            return "DBMS_RANDOM.VALUE"
+        if dialect == "sqlite":
+            return "(ABS(RANDOM()) % 1000000) / 1000000.0"
+        return "RANDOM()"
+
+    @staticmethod
+    def _to_chunk(
+        columns: List[str], rows: Sequence[Any], output: str, schema: Optional[pa.Schema] = None
+    ) -> Union[pd.DataFrame, pa.Table]:
+        """
+        Converts one page of rows. For Arrow, `schema` (from the previous page) is reused
+        so types are inferred once per scan; only columns that were all-NULL so far are
+        inferred again. Decimal columns are inferred per page and cast to
+        ARROW_DECIMAL_TYPE, so a later page with wider values keeps the same schema.
+        """
+        if output == "arrow":
+            arrays = []
+            for i, c in enumerate(columns):
+                known = schema.field(i).type if schema is not None else None
+                if known is not None and (pa.types.is_null(known) or pa.types.is_decimal(known)):
+                    known = None
+                array = pa.array([r[i] for r in rows], type=known)
+                if pa.types.is_decimal(array.type) and array.type != ARROW_DECIMAL_TYPE:
+                    array = array.cast(ARROW_DECIMAL_TYPE)
+                arrays.append(array)
+            return pa.Table.from_arrays(arrays, names=columns)
+        if output == "pandas":
+            return pd.DataFrame.from_records(rows, columns=columns)
+        raise ValueError(f"Unsupported output format: {output}")
+
 class NoSqlConnector:
     """Handles connection and querying for MongoDB."""
     
@@ -64,3 +404,160 @@ class NoSqlConnector:
         except Exception as e:
             logging.error(f"Failed to find documents: {e}")
             raise
+
+    def stream_documents(
+        self,
+        collection_name: str,
+        filter: Dict[str, Any],
+        schema: pa.Schema,
+        batch_size: int = 10_000,
+        projection: Dict[str, Any] = None,
+    ) -> Generator[pa.Table, None, None]:
+        """
+        Iterates the cursor in server batches of `batch_size` and yields
+        columnar Arrow tables with the declared schema. Memory is bounded by
+        one batch; the projection defaults to the schema's fields so unused
+        fields are never sent or decoded. Field names may be dotted paths
+        ("address.city") into embedded documents.
+
+        Documents arrive as RawBSONDocument and only the schema's paths are
+        read out of them, straight into per-column builders.
+        """
+        collection = self.db[collection_name].with_options(
+            codec_options=CodecOptions(document_class=RawBSONDocument)
+        )
+        if projection is None:
+            projection = {name: 1 for name in schema.names}
+            if "_id" not in projection:
+                projection["_id"] = 0
+        paths = [name.split(".") for name in schema.names]
+        cursor = collection.find(filter, projection, batch_size=batch_size)
+        try:
+            builders: List[List[Any]] = [[] for _ in paths]
+            count = 0
+            for doc in cursor:
+                for path, column in zip(paths, builders):
+                    column.append(self._lookup(doc, path))
+                count += 1
+                if count >= batch_size:
+                    yield self._decode(builders, schema)
+                    builders, count = [[] for _ in paths], 0
+            if count:
+                yield self._decode(builders, schema)
+        except Exception as e:
+            logging.error(f"Failed to stream documents from '{collection_name}': {e}")
+            raise
+        finally:
+            cursor.close()
+
+    def parallel_stream(
+        self,
+        collection_name: str,
+        filter: Dict[str, Any],
+        schema: pa.Schema,
+        num_splits: int = 8,
+        max_workers: int = 4,
+        batch_size: int = 10_000,
+        ordered: bool = False,
+    ) -> Generator[pa.Table, None, None]:
+        """
+        Splits the matching documents into `_id` ranges and streams them
+        concurrently (MongoClient is thread-safe and pools connections).
+
+        MongoDB range operators only match values of the bound's BSON type, so
+        the first split also reads every document whose `_id` is of another
+        type; if the sample itself shows mixed `_id` types the scan is not split.
+        """
+        boundaries, id_type = self._id_boundaries(collection_name, filter, num_splits)
+        edges = [None] + boundaries + [None]
+
+        def split(idx, lo, hi):
+            id_range = {}
+            if lo is not None:
+                id_range["$gte"] = lo
+            if hi is not None:
+                id_range["$lt"] = hi
+            if not id_range:
+                return self.stream_documents(collection_name, filter, schema, batch_size)
+            range_filter = {"_id": id_range}
+            if idx == 0:
+                range_filter = {"$or": [range_filter, {"_id": {"$not": {"$type": id_type}}}]}
+            return self.stream_documents(collection_name, {"$and": [filter, range_filter]}, schema, batch_size)
+
+        producers = [
+            lambda idx=i, lo=edges[i], hi=edges[i + 1]: split(idx, lo, hi)
+            for i in range(len(edges) - 1)
+        ]
+        logging.info(f"Streaming '{collection_name}' in {len(producers)} _id ranges.")
+        yield from stream_concurrently(producers, max_workers, ordered, thread_name_prefix="mongo-scan")
+
+    def _id_boundaries(
+        self, collection_name: str, filter: Dict[str, Any], num_splits: int, oversample: int = 20
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Approximate equal-depth `_id` split points from a random `$sample`,
+        plus the `$type` alias of the sampled `_id`s (None when not splittable).
+        """
+        if num_splits <= 1:
+            return [], None
+        pipeline = [
+            {"$match": filter},
+            {"$sample": {"size": num_splits * oversample}},
+            {"$project": {"_id": 1}},
+        ]
+        sample = [doc["_id"] for doc in self.db[collection_name].aggregate(pipeline)]
+        id_types = {self._bson_type_alias(v) for v in sample}
+        if len(id_types) != 1 or None in id_types:
+            if sample:
+                logging.warning(f"'{collection_name}' has mixed or unsupported _id types; not splitting the scan.")
+            return [], None
+        sample.sort()
+        step = len(sample) / num_splits
+        points = [sample[int(i * step)] for i in range(1, num_splits)]
+        return [p for i, p in enumerate(points) if i == 0 or p != points[i - 1]], id_types.pop()
+
+    @staticmethod
+    def _bson_type_alias(value: Any) -> Optional[str]:
+        """`$type` alias of the comparison bracket `value` sorts in (numbers compare across types)."""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float, Int64, Decimal128)):
+            return "number"
+        if isinstance(value, ObjectId):
+            return "objectId"
+        if isinstance(value, str):
+            return "string"
+        if isinstance(value, datetime):
+            return "date"
+        return None
+
+    @staticmethod
+    def _lookup(doc: Mapping, path: List[str]) -> Any:
+        """Value at a dotted path, or None when any step is missing or not a document."""
+        value: Any = doc
+        for part in path:
+            if not isinstance(value, Mapping):
+                return None
+            value = value.get(part)
+        return value
+
+    @staticmethod
+    def _plain(value: Any) -> Any:
+        if isinstance(value, Mapping):
+            return {k: NoSqlConnector._plain(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [NoSqlConnector._plain(v) for v in value]
+        return value
+
+    @staticmethod
+    def _decode(builders: List[List[Any]], schema: pa.Schema) -> pa.Table:
+        """Builds the Arrow table from per-column value lists; ObjectIds become strings for string fields."""
+        arrays = []
+        for field, values in zip(schema, builders):
+            if pa.types.is_string(field.type) or pa.types.is_large_string(field.type):
+                values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+            elif pa.types.is_nested(field.type):
+                # embedded RawBSONDocuments are Mappings, not dicts, to pyarrow
+                values = [NoSqlConnector._plain(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
@@ -0,0 +1,281 @@
+"""
+cleaning/bench.py
+
+Benchmark harness & regression gate for the cleaning engine.
+
+Times every DataCleaner stage over a rows x columns grid of synthetic
+frames and compares the result with a stored JSON baseline, e.g.
+
+    python -m cleaning.bench rules/transaction_features.yaml benchmarks/cleaning_baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import polars as pl
+import structlog
+
+from cleaning.engine import CleaningRules, ColumnSchema, DataCleaner, _peak_rss_mb, load_rules
+
+logger = structlog.get_logger(__name__)
+
+
+BENCH_STAGES = (
+    "fit",
+    "_coerce_dtypes",
+    "_drop_high_missing",
+    "_clean_numeric",
+    "_clean_categorical",
+    "_clean_datetime",
+)
+
+
+class _PeakRss:
+    """Sample RSS in a background thread; `peak_mb` is the growth over the block."""
+
+    def __init__(self, interval_s: float = 0.01) -> None:
+        self.interval_s = interval_s
+        self.peak_mb = 0.0
+
+    def __enter__(self) -> "_PeakRss":
+        try:
+            import psutil
+        except ImportError:  # fall back to the process-lifetime high-water mark
+            self._proc = None
+            self._base = _peak_rss_mb()
+            return self
+
+        self._proc = psutil.Process()
+        self._base = self._peak = self._proc.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._peak = max(self._peak, self._proc.memory_info().rss)
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._proc is None:
+            self.peak_mb = max(0.0, _peak_rss_mb() - self._base)
+            return
+        self._stop.set()
+        self._thread.join()
+        self._peak = max(self._peak, self._proc.memory_info().rss)
+        self.peak_mb = (self._peak - self._base) / (1024 * 1024)
+
+
+def synthetic_case(
+    rules: CleaningRules,
+    n_rows: int,
+    n_cols: Optional[int] = None,
+    null_rate: float = 0.05,
+    outlier_rate: float = 0.01,
+    seed: int = 0,
+) -> Tuple[CleaningRules, pl.DataFrame]:
+    """
+    Generate a frame shaped like `rules.schema`, widened to `n_cols` by
+    cycling through the schema columns (rules are widened to match).
+    """
+    rng = np.random.default_rng(seed)
+    base = list(rules.schema.items())
+    n_cols = n_cols or len(base)
+
+    schema: Dict[str, ColumnSchema] = {}
+    for i in range(n_cols):
+        name, col_schema = base[i % len(base)]
+        schema[name if i < len(base) else f"{name}_{i}"] = col_schema
+
+    raw: Dict[str, np.ndarray] = {}
+    exprs: List[pl.Expr] = []
+    for name, col_schema in schema.items():
+        dtype = col_schema.dtype
+        if dtype.startswith("float") or dtype.startswith("int"):
+            values = rng.normal(100.0, 15.0, n_rows)
+            outliers = rng.random(n_rows) < outlier_rate
+            values[outliers] *= rng.choice([-50.0, 50.0], outliers.sum())
+            expr = pl.col(name) if dtype.startswith("float") else pl.col(name).round(0)
+        elif dtype == "string":
+            values = np.minimum(rng.zipf(1.5, n_rows), 500).astype(np.float64)
+            expr = pl.concat_str([pl.lit("cat_"), pl.col(name).cast(pl.Int64).cast(pl.Utf8)])
+        elif dtype in ("datetime", "date"):
+            values = rng.integers(1_700_000_000, 1_760_000_000, n_rows).astype(np.float64)
+            expr = pl.from_epoch(pl.col(name).cast(pl.Int64), time_unit="s").dt.strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+        else:
+            values = rng.random(n_rows)
+            expr = pl.col(name) > 0.5
+        values[rng.random(n_rows) < null_rate] = np.nan
+        raw[name] = values
+        exprs.append(expr.alias(name))
+
+    df = pl.DataFrame(raw).with_columns(pl.all().fill_nan(None)).select(exprs)
+    widened = rules.copy(update={"schema": schema})
+    return widened, df
+
+
+def benchmark_case(
+    rules: CleaningRules, df: pl.DataFrame, repeats: int = 3
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time each stage separately on materialized input (median of `repeats`).
+
+    Every stage is collected so its cost is not hidden in the next stage's
+    lazy graph; peak memory is the RSS growth while the stage runs.
+    """
+    timings: Dict[str, List[float]] = {stage: [] for stage in BENCH_STAGES}
+    peaks: Dict[str, List[float]] = {stage: [] for stage in BENCH_STAGES}
+
+    for _ in range(repeats):
+        cleaner = DataCleaner(rules=rules, correlation_id="bench")
+        with _PeakRss() as mem:
+            started = time.perf_counter()
+            plan = cleaner.fit(df.lazy())
+        timings["fit"].append(time.perf_counter() - started)
+        peaks["fit"].append(mem.peak_mb)
+
+        stages = {
+            "_coerce_dtypes": cleaner._coerce_dtypes,
+            "_drop_high_missing": lambda lf: cleaner._drop_high_missing(lf, plan),
+            "_clean_numeric": lambda lf: cleaner._clean_numeric(lf, plan),
+            "_clean_categorical": lambda lf: cleaner._clean_categorical(lf, plan),
+            "_clean_datetime": cleaner._clean_datetime,
+        }
+        current = df
+        for stage, step in stages.items():
+            with _PeakRss() as mem:
+                started = time.perf_counter()
+                current = step(current.lazy()).collect()
+            timings[stage].append(time.perf_counter() - started)
+            peaks[stage].append(mem.peak_mb)
+
+    return {
+        stage: {
+            "seconds": round(float(np.median(timings[stage])), 4),
+            "peak_mb": round(max(peaks[stage]), 1),
+        }
+        for stage in BENCH_STAGES
+    }
+
+
+def estimated_case_mb(n_rows: int, n_cols: int) -> float:
+    """
+    Rough peak for one case: the float64 generation buffer plus the frame and
+    the copies a collected stage keeps alive (about 4 x 8 bytes per cell).
+    """
+    return n_rows * n_cols * 32 / (1024 * 1024)
+
+
+def run_benchmarks(
+    rules: CleaningRules,
+    row_counts: Sequence[int] = (100_000, 1_000_000),
+    col_counts: Sequence[int] = (10, 100),
+    null_rate: float = 0.05,
+    outlier_rate: float = 0.01,
+    repeats: int = 3,
+    max_case_mb: float = 4096,
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Run the rows x columns grid; keys are stable so results diff against baselines.
+
+    Cases are materialized in memory; those whose estimated footprint exceeds
+    `max_case_mb` are skipped (and logged) instead of exhausting the host.
+    """
+    log = logger.bind(stage="benchmark", table=rules.table)
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for n_rows in row_counts:
+        for n_cols in col_counts:
+            key = f"rows={n_rows}|cols={n_cols}|nulls={null_rate}|outliers={outlier_rate}"
+            estimate = estimated_case_mb(n_rows, n_cols)
+            if estimate > max_case_mb:
+                log.warning("benchmark_case_skipped", case=key, estimated_mb=round(estimate), max_case_mb=max_case_mb)
+                continue
+            case_rules, df = synthetic_case(rules, n_rows, n_cols, null_rate, outlier_rate)
+            results[key] = benchmark_case(case_rules, df, repeats=repeats)
+            log.info("benchmark_case", case=key, stages=results[key])
+            del df
+    return results
+
+
+def check_regressions(
+    results: Mapping[str, Mapping[str, Mapping[str, float]]],
+    baseline: Mapping[str, Mapping[str, Mapping[str, float]]],
+    tolerance: float = 0.15,
+    min_delta_s: float = 0.05,
+) -> List[str]:
+    """
+    Compare against a baseline; return one message per regressed stage.
+
+    A stage regresses when seconds or peak_mb exceed baseline * (1 + tolerance);
+    time deltas below `min_delta_s` are treated as noise.
+    """
+    regressions: List[str] = []
+    for case, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baseline.get(case, {}).get(stage)
+            if base is None:
+                continue
+            seconds, base_seconds = metrics["seconds"], base["seconds"]
+            if seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > min_delta_s:
+                regressions.append(f"{case} {stage}: {base_seconds:.3f}s -> {seconds:.3f}s")
+            if metrics["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 1.0:
+                regressions.append(
+                    f"{case} {stage}: {base['peak_mb']:.1f}MB -> {metrics['peak_mb']:.1f}MB"
+                )
+    return regressions
+
+
+def benchmark_gate(
+    rules: CleaningRules,
+    baseline_path: Path,
+    update_baseline: bool = False,
+    tolerance: float = 0.15,
+    **grid: Any,
+) -> int:
+    """Run the grid and gate against the stored JSON baseline (returns an exit code)."""
+    results = run_benchmarks(rules, **grid)
+    if update_baseline or not baseline_path.exists():
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        logger.info("benchmark_baseline_written", path=str(baseline_path))
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    regressions = check_regressions(results, baseline, tolerance=tolerance)
+    for msg in regressions:
+        logger.error("benchmark_regression", detail=msg)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cleaning stages and gate on regressions")
+    parser.add_argument("rules", type=Path, help="Rules YAML the synthetic data is shaped after")
+    parser.add_argument("baseline", type=Path, help="Baseline JSON (written if missing)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--cols", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--max-case-mb", type=float, default=4096)
+    args = parser.parse_args()
+
+    # Fails (exit 1) when a stage regresses beyond tolerance
+    raise SystemExit(
+        benchmark_gate(
+            load_rules(args.rules),
+            args.baseline,
+            update_baseline=args.update_baseline,
+            tolerance=args.tolerance,
+            row_counts=args.rows,
+            col_counts=args.cols,
+            max_case_mb=args.max_case_mb,
+        )
+    )
@@ -12,10 +12,16 @@ Key ideas:
 
 from __future__ import annotations
 
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, Optional, Sequence
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
+import numpy as np
 import polars as pl
 import structlog
 import yaml
@@ -117,6 +123,203 @@ def load_rules(path: Path) -> CleaningRules:
     return CleaningRules(**raw)
 
 
+# ---------------------------------------------------------------------------
+# Statistics bundle (single batched pass)
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class CleaningStats:
+    """
+    Every statistic the numeric/categorical steps need, gathered in one
+    batched `select` over the (coerced, column/row-filtered) input.
+
+    Quartiles and category frequencies are computed over the *imputed*
+    columns so results match the step-by-step pipeline exactly. When
+    `approximate` is set (streaming mode), values come from sketches and
+    `category_counts` only holds the frequent keys.
+    """
+
+    row_count: int = 0
+    null_counts: Dict[str, int] = field(default_factory=dict)
+    numeric_fill: Dict[str, Optional[float]] = field(default_factory=dict)
+    quartiles: Dict[str, Tuple[Optional[float], Optional[float]]] = field(default_factory=dict)
+    modes: Dict[str, Any] = field(default_factory=dict)
+    category_counts: Dict[str, Dict[Any, int]] = field(default_factory=dict)
+    approximate: bool = False
+
+
+# ---------------------------------------------------------------------------
+# Approximate sketches (bounded-memory streaming statistics)
+# ---------------------------------------------------------------------------
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) with vectorised batch updates.
+
+    Holds roughly `compression / 2` centroids no matter how many values
+    are added; digests are mergeable, so per-batch digests can be combined.
+    """
+
+    def __init__(self, compression: float = 200.0) -> None:
+        self.compression = compression
+        self._means = np.empty(0, dtype=np.float64)
+        self._weights = np.empty(0, dtype=np.float64)
+
+    @property
+    def count(self) -> float:
+        return float(self._weights.sum())
+
+    def update(self, values: np.ndarray, weights: Optional[np.ndarray] = None) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if weights is None:
+            weights = np.ones_like(values)
+        mask = ~np.isnan(values)
+        if mask.any():
+            self._compress(values[mask], np.asarray(weights, dtype=np.float64)[mask])
+
+    def merge(self, other: "TDigest") -> None:
+        self._compress(other._means, other._weights)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        means = np.concatenate([self._means, means])
+        weights = np.concatenate([self._weights, weights])
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+
+        # k1 scale function: points sharing floor(k(q)) collapse into one centroid,
+        # giving small centroids near the tails and large ones near the median.
+        q = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        bucket = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+        self._weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(means * weights, starts) / self._weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self._weights.size == 0:
+            return None
+        if self._weights.size == 1:
+            return float(self._means[0])
+        centers = np.cumsum(self._weights) - self._weights / 2
+        return float(np.interp(q * self._weights.sum(), centers, self._means))
+
+
+class FrequencySketch:
+    """
+    Count-min sketch plus a bounded candidate set of frequent keys.
+
+    Only keys whose estimated share is >= `min_pct` are retained, so the
+    candidate set holds at most ~1/min_pct keys; everything else is rare.
+    """
+
+    def __init__(self, min_pct: float, width: int = 4096, depth: int = 4) -> None:
+        self.min_pct = min_pct
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self.candidates: Dict[Any, int] = {}
+        self._top: Tuple[Any, int] = (None, 0)
+
+    def _indices(self, keys: pl.Series, row: int) -> np.ndarray:
+        return (keys.hash(seed=row).to_numpy() % self.width).astype(np.int64)
+
+    def _estimate(self, keys: pl.Series) -> np.ndarray:
+        return np.min(
+            [self.table[row, self._indices(keys, row)] for row in range(self.depth)],
+            axis=0,
+        )
+
+    def update(self, values: pl.Series) -> None:
+        self.total += values.len()
+        vc = values.cast(pl.Utf8).drop_nulls().value_counts()
+        if vc.height == 0:
+            return
+        keys, counts = vc[:, 0], vc[:, 1].to_numpy()
+        for row in range(self.depth):
+            np.add.at(self.table[row], self._indices(keys, row), counts)
+
+        est = self._estimate(keys)
+        i = int(est.argmax())
+        if est[i] >= self._top[1]:
+            self._top = (keys[i], int(est[i]))
+
+        if self.min_pct > 0:
+            floor = self.min_pct * self.total
+            for key, n in zip(keys.to_list(), est.tolist()):
+                if n >= floor:
+                    self.candidates[key] = n
+            if len(self.candidates) > 2 / self.min_pct:
+                self._refresh(floor)
+
+    def _refresh(self, floor: float) -> None:
+        if not self.candidates:
+            return
+        keys = pl.Series(list(self.candidates), dtype=pl.Utf8)
+        est = self._estimate(keys)
+        self.candidates = {k: n for k, n in zip(keys.to_list(), est.tolist()) if n >= floor}
+
+    def top(self) -> Any:
+        """Approximate mode (most frequent non-null key)."""
+        return self._top[0]
+
+    def estimate(self, key: Any) -> int:
+        return int(self._estimate(pl.Series([key], dtype=pl.Utf8))[0])
+
+    def frequent_counts(self) -> Dict[Any, int]:
+        self._refresh(self.min_pct * self.total)
+        return dict(self.candidates)
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Unix only)."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---------------------------------------------------------------------------
+# Fitted cleaning plan (fit once, apply many)
+# ---------------------------------------------------------------------------
+
+
+class CleaningPlan(BaseModel):
+    """
+    Small, serializable artifact holding every fitted constant.
+
+    Applying a plan is a pure expression graph (no collects), so the same
+    plan cleans every micro-batch identically and runs in streaming mode.
+    """
+
+    table: str
+    rule_version: Optional[int] = None
+    fitted_run_id: Optional[str] = None
+    rows_fitted: int = 0
+
+    keep_columns: List[str] = Field(default_factory=list)
+    drop_columns: List[str] = Field(default_factory=list)
+    numeric_fill: Dict[str, float] = Field(default_factory=dict)
+    clip_bounds: Dict[str, Tuple[float, float]] = Field(default_factory=dict)
+    categorical_fill: Dict[str, str] = Field(default_factory=dict)
+    rare_categories: Dict[str, List[str]] = Field(default_factory=dict)
+    # sketch-fitted plans keep the frequent set; anything else becomes OTHER
+    frequent_categories: Dict[str, List[str]] = Field(default_factory=dict)
+
+    def save(self, path: Path) -> None:
+        """Persist the plan as JSON."""
+        path.write_text(self.json(indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "CleaningPlan":
+        """Load a plan previously written by `save`."""
+        return cls.parse_raw(path.read_text(encoding="utf-8"))
+
+
 # ---------------------------------------------------------------------------
 # Core Cleaning Engine
 # ---------------------------------------------------------------------------
@@ -155,7 +358,7 @@ class DataCleaner:
 
     def transform(self, df: pl.LazyFrame) -> pl.LazyFrame:
         """
-        Main cleaning entrypoint.
+        Main cleaning entrypoint: fit on this batch, then apply.
 
         The @check_io decorator is dynamically attached to preserve
         Pandera contracts while allowing LazyFrame-based implementation.
@@ -163,47 +366,142 @@ class DataCleaner:
 
         @self._check_io_decorator()
         def _inner_transform(df_in: pl.LazyFrame) -> pl.LazyFrame:
+            self._audit = {}  # each run reports only its own figures
             log = self._log(stage="start")
             log.info("cleaning_start")
 
-            rows_in = None  # we lazily infer later
+            plan = self.fit(df_in)
+            df_clean = self.apply(df_in, plan)
 
-            df_clean = df_in
+            # rows_out comes from the stats pass (no later step drops rows)
+            self._audit.setdefault("rows_out", plan.rows_fitted)
 
-            # 1. Coerce dtypes where configured
-            df_clean = self._coerce_dtypes(df_clean)
+            log.info(
+                "cleaning_complete",
+                audit=self._audit,
+            )
+            return df_clean
+
+        return _inner_transform(df)
 
-            # 2. Drop high-missing columns / rows
-            df_clean = self._drop_high_missing(df_clean)
+    def fit(self, df: pl.LazyFrame) -> CleaningPlan:
+        """
+        Compute every fitted constant (two passes: null counts, then stats).
+        """
+        log = self._log(stage="fit")
+
+        # 1. Coerce dtypes so stats are computed on the cleaned types
+        df_fit = self._coerce_dtypes(df)
+
+        # 2. Decide which columns survive the high-missing rule
+        keep_cols, drop_cols = self._fit_drop_columns(df_fit)
+        plan = CleaningPlan(
+            table=self.rules.table,
+            rule_version=self.rules.rule_version,
+            fitted_run_id=self.correlation_id,
+            keep_columns=keep_cols,
+            drop_columns=drop_cols,
+        )
+        if self._audit.get("rows_in") == 0:
+            return plan
 
-            # 3. Numeric pipeline
-            df_clean = self._clean_numeric(df_clean)
+        # 3. Gather all statistics in one batched pass over surviving rows
+        df_fit = self._drop_high_missing(df_fit, plan)
+        stats = self._plan_stats(df_fit)
+        plan = self._plan_from_stats(plan, stats)
 
-            # 4. Categorical pipeline
-            df_clean = self._clean_categorical(df_clean)
+        log.info("plan_fitted", rows=plan.rows_fitted, rule_version=plan.rule_version)
+        return plan
 
-            # 5. Datetime pipeline
-            df_clean = self._clean_datetime(df_clean)
+    def apply(self, df: pl.LazyFrame, plan: CleaningPlan, streaming: bool = False) -> pl.LazyFrame:
+        """
+        Apply a fitted plan as a pure expression graph (no collects).
 
-            # 6. Attach audit metadata
-            df_clean = df_clean.with_columns(
-                pl.lit(self.correlation_id).alias("_cleaning_run_id"),
-                pl.lit(self.rules.rule_version).alias("_cleaning_rule_version"),
-                pl.lit(self.rules.table).alias("_cleaning_table"),
+        With `streaming=True`, order-dependent steps (datetime ffill/bfill)
+        are skipped so the graph runs end to end in the streaming engine.
+        """
+        if plan.table != self.rules.table or plan.rule_version != self.rules.rule_version:
+            raise ValueError(
+                f"Plan for {plan.table} v{plan.rule_version} does not match "
+                f"rules for {self.rules.table} v{self.rules.rule_version}"
             )
 
-            # 7. Collect minimal stats for audit (rows_in/out, etc.)
-            stats = df_clean.select(pl.len().alias("_rows_out")).collect()
-            rows_out = int(stats["_rows_out"][0])
-            self._audit.setdefault("rows_out", rows_out)
+        df_clean = df
 
-            log.info(
-                "cleaning_complete",
-                audit=self._audit,
+        # 1. Coerce dtypes where configured
+        df_clean = self._coerce_dtypes(df_clean)
+
+        # 2. Drop high-missing columns / rows
+        df_clean = self._drop_high_missing(df_clean, plan)
+
+        # 3. Numeric pipeline
+        df_clean = self._clean_numeric(df_clean, plan)
+
+        # 4. Categorical pipeline
+        df_clean = self._clean_categorical(df_clean, plan)
+
+        # 5. Datetime pipeline
+        df_clean = self._clean_datetime(df_clean, streaming=streaming)
+
+        # 6. Attach audit metadata
+        return df_clean.with_columns(
+            pl.lit(self.correlation_id).alias("_cleaning_run_id"),
+            pl.lit(self.rules.rule_version).alias("_cleaning_rule_version"),
+            pl.lit(self.rules.table).alias("_cleaning_table"),
+        )
+
+    def transform_streaming(
+        self,
+        source_glob: str,
+        sink_path: Path,
+        memory_budget_mb: int = 512,
+        compression: float = 200.0,
+    ) -> Dict[str, Any]:
+        """
+        Out-of-core cleaning: scan Parquet/CSV -> sketch stats -> sink_parquet.
+
+        Three bounded-memory passes (null counts, sketches, apply + sink).
+        Quantiles come from t-digests and category frequencies from count-min
+        sketches, so peak memory depends on `memory_budget_mb` and sketch
+        size, not on input volume. Returns the audit dict.
+        """
+        self._audit = {}  # each run reports only its own figures
+        log = self._log(stage="streaming")
+        log.info("cleaning_start", source=source_glob, memory_budget_mb=memory_budget_mb)
+        started = time.perf_counter()
+
+        scan = self._scan_source(source_glob)
+        batch_rows = self._rows_per_batch(scan.schema, memory_budget_mb)
+
+        # chunk size is scoped to this run; the global Polars config is restored on exit
+        with pl.Config(streaming_chunk_size=batch_rows):
+            # 1. Null-count pass (streaming aggregation)
+            keep_cols, drop_cols = self._fit_drop_columns(self._coerce_dtypes(scan), streaming=True)
+            plan = CleaningPlan(
+                table=self.rules.table,
+                rule_version=self.rules.rule_version,
+                fitted_run_id=self.correlation_id,
+                keep_columns=keep_cols,
+                drop_columns=drop_cols,
             )
-            return df_clean
 
-        return _inner_transform(df)
+            # 2. Sketch pass over record batches
+            if self._audit.get("rows_in"):
+                stats = self._sketch_stats(source_glob, plan, batch_rows, compression)
+                plan = self._plan_from_stats(plan, stats)
+
+            # 3. Apply the plan and sink straight to Parquet
+            self.apply(scan, plan, streaming=True).sink_parquet(sink_path)
+
+        elapsed = time.perf_counter() - started
+        self._audit.setdefault("rows_out", plan.rows_fitted)
+        self._audit["batch_rows"] = batch_rows
+        self._audit["elapsed_s"] = round(elapsed, 3)
+        self._audit["rows_per_sec"] = round(plan.rows_fitted / elapsed, 1) if elapsed else None
+        self._audit["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+
+        log.info("cleaning_complete", sink=str(sink_path), audit=self._audit)
+        return self._audit
 
     # ------------------------------------------------------------------- #
     # Step 0: Coerce dtypes according to schema                           #
@@ -253,7 +551,10 @@ class DataCleaner:
     # Step 1: Drop high-missing columns and rows                          #
     # ------------------------------------------------------------------- #
 
-    def _drop_high_missing(self, df: pl.LazyFrame) -> pl.LazyFrame:
+    def _fit_drop_columns(
+        self, df: pl.LazyFrame, streaming: bool = False
+    ) -> Tuple[List[str], List[str]]:
+        """Return (keep, drop) columns from one null-count pass."""
         cfg = self.rules.cleaning
         log = self._log(stage="drop_high_missing")
 
@@ -262,13 +563,13 @@ class DataCleaner:
         cols = list(df.schema.keys())
         null_exprs = [pl.col(c).null_count().alias(c) for c in cols]
         stats_lf = df.select(null_exprs + [pl.len().alias("__len")])
-        stats = stats_lf.collect()
+        stats = stats_lf.collect(streaming=streaming)
         total_rows = stats["__len"][0] if "__len" in stats.columns else 0
 
         if total_rows == 0:
             self._audit["rows_in"] = 0
             self._audit["rows_out"] = 0
-            return df  # nothing to do
+            return cols, []  # nothing to do
 
         self._audit["rows_in"] = int(total_rows)
 
@@ -290,96 +591,331 @@ class DataCleaner:
                 threshold=cfg.drop_columns_if_missing_gt,
                 columns=drop_cols,
             )
+        return keep_cols, drop_cols
 
+    def _drop_high_missing(self, df: pl.LazyFrame, plan: CleaningPlan) -> pl.LazyFrame:
+        cfg = self.rules.cleaning
+
+        keep_cols = plan.keep_columns
         df = df.select(keep_cols)
 
         # Row-wise missing fraction
-        # Count nulls horizontally on remaining columns.
-        row_nulls_expr = pl.all().null_count().keep_name().sum_horizontal().alias("_row_nulls")
-        df = df.with_columns(row_nulls_expr)
-
-        df = df.with_columns(
-            (pl.col("_row_nulls") / pl.len()).alias("_row_missing_frac")
-        ).filter(
-            pl.col("_row_missing_frac") <= cfg.drop_rows_if_missing_gt
-        ).drop(
-            ["_row_nulls", "_row_missing_frac"]
-        )
+        # Count nulls horizontally (per row) on remaining columns.
+        if keep_cols:
+            row_missing_frac = pl.sum_horizontal(pl.col(keep_cols).is_null()) / len(keep_cols)
+            df = df.filter(row_missing_frac <= cfg.drop_rows_if_missing_gt)
 
         self._audit["drop_rows_if_missing_gt"] = cfg.drop_rows_if_missing_gt
         return df
 
     # ------------------------------------------------------------------- #
-    # Step 2: Numeric cleaning                                            #
+    # Step 1b: Statistics planning (one batched pass)                     #
     # ------------------------------------------------------------------- #
 
-    def _clean_numeric(self, df: pl.LazyFrame) -> pl.LazyFrame:
-        cfg = self.rules.cleaning.numeric
-        log = self._log(stage="numeric")
-
-        # Identify numeric columns from schema configuration
-        numeric_cols = [
+    def _numeric_columns(self, columns: Mapping[str, Any] | Sequence[str]) -> List[str]:
+        """Numeric columns from schema configuration that are present in `columns`."""
+        return [
             name
             for name, col_schema in self.rules.schema.items()
             if col_schema.dtype.startswith("float") or col_schema.dtype.startswith("int")
-            if name in df.schema
+            if name in columns
         ]
 
-        if not numeric_cols:
-            return df
+    def _categorical_columns(self, columns: Mapping[str, Any] | Sequence[str]) -> List[str]:
+        """String columns from schema configuration that are present in `columns`."""
+        return [
+            name
+            for name, col_schema in self.rules.schema.items()
+            if col_schema.dtype == "string" and name in columns
+        ]
 
-        # Imputation according to default_strategy
-        impute_exprs: List[pl.Expr] = []
-        for col in numeric_cols:
-            if cfg.default_strategy == "median":
-                impute_exprs.append(
-                    pl.col(col).fill_null(pl.col(col).median())
-                )
-            elif cfg.default_strategy == "mean":
-                impute_exprs.append(
-                    pl.col(col).fill_null(pl.col(col).mean())
+    def _numeric_impute_expr(self, col: str) -> pl.Expr:
+        """In-frame imputation expression (used only inside the stats pass)."""
+        cfg = self.rules.cleaning.numeric
+        if cfg.default_strategy == "median":
+            return pl.col(col).fill_null(pl.col(col).median())
+        if cfg.default_strategy == "mean":
+            return pl.col(col).fill_null(pl.col(col).mean())
+        if cfg.default_strategy == "constant":
+            if cfg.default_fill_value is None:
+                raise ValueError(
+                    f"default_fill_value must be set for constant strategy (numeric col={col})"
                 )
-            elif cfg.default_strategy == "constant":
-                if cfg.default_fill_value is None:
-                    raise ValueError(
-                        f"default_fill_value must be set for constant strategy (numeric col={col})"
-                    )
-                impute_exprs.append(
-                    pl.col(col).fill_null(cfg.default_fill_value)
+            return pl.col(col).fill_null(cfg.default_fill_value)
+        raise ValueError(f"Unsupported numeric imputation strategy: {cfg.default_strategy}")
+
+    def _categorical_impute_expr(self, col: str) -> pl.Expr:
+        """In-frame imputation expression (used only inside the stats pass)."""
+        cfg = self.rules.cleaning.categorical
+        if cfg.default_strategy == "mode":
+            return pl.col(col).fill_null(pl.col(col).mode().first())
+        if cfg.default_strategy == "constant":
+            if cfg.default_fill_value is None:
+                raise ValueError(
+                    f"default_fill_value must be set for constant strategy (categorical col={col})"
                 )
+            return pl.col(col).fill_null(cfg.default_fill_value)
+        raise ValueError(f"Unsupported categorical imputation strategy: {cfg.default_strategy}")
+
+    def _iqr_factor(self) -> Optional[float]:
+        """Parse the IQR factor from e.g. "clip_iqr_1_5"; None if clipping is off."""
+        strategy = self.rules.cleaning.numeric.outlier_strategy
+        if not strategy or not strategy.startswith("clip_iqr"):
+            return None
+        parts = strategy.split("_")
+        factor = 1.5
+        try:
+            factor = float(f"{parts[-2]}.{parts[-1]}")
+        except Exception:
+            pass
+        return factor
+
+    def _plan_stats(self, df: pl.LazyFrame) -> CleaningStats:
+        """
+        Gather every statistic the numeric/categorical steps need in ONE
+        batched select (a single scan), regardless of column count.
+        """
+        numeric_cols = self._numeric_columns(df.schema)
+        cat_cols = self._categorical_columns(df.schema)
+        cat_cfg = self.rules.cleaning.categorical
+        clip = self._iqr_factor() is not None
+
+        exprs: List[pl.Expr] = [pl.len().alias("__len")]
+        for col in numeric_cols + cat_cols:
+            exprs.append(pl.col(col).null_count().alias(f"__nulls__{col}"))
+
+        num_strategy = self.rules.cleaning.numeric.default_strategy
+        for col in numeric_cols:
+            imputed = self._numeric_impute_expr(col)
+            if num_strategy == "median":
+                exprs.append(pl.col(col).median().alias(f"__median__{col}"))
+            elif num_strategy == "mean":
+                exprs.append(pl.col(col).mean().alias(f"__mean__{col}"))
+            if clip:
+                exprs.append(imputed.quantile(0.25).alias(f"__q1__{col}"))
+                exprs.append(imputed.quantile(0.75).alias(f"__q3__{col}"))
+
+        for col in cat_cols:
+            imputed = self._categorical_impute_expr(col).alias(col)
+            if cat_cfg.default_strategy == "mode":
+                exprs.append(pl.col(col).mode().first().alias(f"__mode__{col}"))
+            exprs.append(imputed.value_counts().implode().alias(f"__freq__{col}"))
+
+        log = self._log(stage="plan_stats")
+        stats_df = df.select(exprs).collect()
+        log.info("stats_planned", n_exprs=len(exprs), numeric=len(numeric_cols), categorical=len(cat_cols))
+
+        stats = CleaningStats(row_count=int(stats_df["__len"][0]))
+        for col in numeric_cols + cat_cols:
+            stats.null_counts[col] = int(stats_df[f"__nulls__{col}"][0])
+
+        for col in numeric_cols:
+            if num_strategy in ("median", "mean"):
+                stats.numeric_fill[col] = stats_df[f"__{num_strategy}__{col}"][0]
+            if clip:
+                stats.quartiles[col] = (stats_df[f"__q1__{col}"][0], stats_df[f"__q3__{col}"][0])
+
+        for col in cat_cols:
+            if cat_cfg.default_strategy == "mode":
+                stats.modes[col] = stats_df[f"__mode__{col}"][0]
+            counts: Dict[Any, int] = {}
+            for entry in stats_df[f"__freq__{col}"][0].to_list():
+                # count field is "counts" on older polars, "count" on newer
+                n = entry.get("count", entry.get("counts"))
+                counts[entry[col]] = int(n)
+            stats.category_counts[col] = counts
+
+        return stats
+
+    def _plan_from_stats(self, plan: CleaningPlan, stats: CleaningStats) -> CleaningPlan:
+        """Turn raw statistics into the fitted constants the apply-steps use."""
+        num_cfg = self.rules.cleaning.numeric
+        cat_cfg = self.rules.cleaning.categorical
+
+        numeric_fill: Dict[str, float] = {}
+        clip_bounds: Dict[str, Tuple[float, float]] = {}
+        factor = self._iqr_factor()
+        for col in self._numeric_columns(plan.keep_columns):
+            if num_cfg.default_strategy == "constant":
+                numeric_fill[col] = float(num_cfg.default_fill_value)  # type: ignore[arg-type]
+            elif stats.numeric_fill.get(col) is not None:
+                numeric_fill[col] = float(stats.numeric_fill[col])  # type: ignore[arg-type]
+            if factor is not None:
+                q1, q3 = stats.quartiles.get(col, (None, None))
+                if q1 is None or q3 is None:
+                    continue
+                iqr = q3 - q1
+                clip_bounds[col] = (q1 - factor * iqr, q3 + factor * iqr)
+
+        categorical_fill: Dict[str, str] = {}
+        rare_categories: Dict[str, List[str]] = {}
+        frequent_categories: Dict[str, List[str]] = {}
+        for col in self._categorical_columns(plan.keep_columns):
+            if cat_cfg.default_strategy == "constant":
+                categorical_fill[col] = str(cat_cfg.default_fill_value)
+            elif stats.modes.get(col) is not None:
+                categorical_fill[col] = stats.modes[col]
+
+            counts = stats.category_counts.get(col, {})
+            total = stats.row_count if stats.approximate else sum(counts.values())
+            if (
+                not cat_cfg.rare_strategy_group_as_other
+                or cat_cfg.rare_category_min_pct == 0
+                or total == 0
+            ):
+                continue
+            if stats.approximate:
+                # sketches only retain frequent keys: store a keep-list instead
+                frequent_categories[col] = [
+                    cat
+                    for cat, n in counts.items()
+                    if cat is not None and n / total >= cat_cfg.rare_category_min_pct
+                ]
+                continue
+            rare_cats = [
+                cat
+                for cat, n in counts.items()
+                if cat is not None and n / total < cat_cfg.rare_category_min_pct
+            ]
+            if rare_cats:
+                rare_categories[col] = rare_cats
+
+        return plan.copy(
+            update={
+                "rows_fitted": stats.row_count,
+                "numeric_fill": numeric_fill,
+                "clip_bounds": clip_bounds,
+                "categorical_fill": categorical_fill,
+                "rare_categories": rare_categories,
+                "frequent_categories": frequent_categories,
+            }
+        )
+
+    # ------------------------------------------------------------------- #
+    # Step 1c: Sketch statistics (streaming mode)                         #
+    # ------------------------------------------------------------------- #
+
+    @staticmethod
+    def _scan_source(source_glob: str) -> pl.LazyFrame:
+        if source_glob.endswith(".csv"):
+            return pl.scan_csv(source_glob)
+        return pl.scan_parquet(source_glob)
+
+    @staticmethod
+    def _iter_source_batches(source_glob: str, batch_rows: int) -> Iterator[pl.DataFrame]:
+        """Yield bounded record batches (pyarrow dataset scanner)."""
+        import pyarrow.dataset as pads
+
+        fmt = "csv" if source_glob.endswith(".csv") else "parquet"
+        dataset = pads.dataset(sorted(glob.glob(source_glob)), format=fmt)
+        for batch in dataset.to_batches(batch_size=batch_rows):
+            yield pl.from_arrow(batch)
+
+    @staticmethod
+    def _rows_per_batch(schema: Mapping[str, Any], memory_budget_mb: int) -> int:
+        """Size batches so a few in-flight copies fit in the memory budget."""
+        row_bytes = sum(32 if dtype == pl.Utf8 else 8 for dtype in schema.values()) or 8
+        return max(1_024, (memory_budget_mb * 1024 * 1024) // (4 * row_bytes))
+
+    def _sketch_stats(
+        self, source_glob: str, plan: CleaningPlan, batch_rows: int, compression: float
+    ) -> CleaningStats:
+        """Same statistics as `_plan_stats`, from fixed-size sketches."""
+        num_cfg = self.rules.cleaning.numeric
+        cat_cfg = self.rules.cleaning.categorical
+        numeric_cols = self._numeric_columns(plan.keep_columns)
+        cat_cols = self._categorical_columns(plan.keep_columns)
+
+        # building the impute expressions validates the strategy config early
+        for col in numeric_cols:
+            self._numeric_impute_expr(col)
+        for col in cat_cols:
+            self._categorical_impute_expr(col)
+
+        digests = {col: TDigest(compression) for col in numeric_cols}
+        sums = dict.fromkeys(numeric_cols, 0.0)
+        sketches = {col: FrequencySketch(cat_cfg.rare_category_min_pct) for col in cat_cols}
+        stats = CleaningStats(approximate=True)
+        stats.null_counts = dict.fromkeys(numeric_cols + cat_cols, 0)
+
+        for raw in self._iter_source_batches(source_glob, batch_rows):
+            batch = self._drop_high_missing(self._coerce_dtypes(raw.lazy()), plan).collect()
+            stats.row_count += batch.height
+            for col in numeric_cols:
+                stats.null_counts[col] += batch[col].null_count()
+                values = batch[col].drop_nulls().cast(pl.Float64).to_numpy()
+                digests[col].update(values)
+                sums[col] += float(values.sum())
+            for col in cat_cols:
+                stats.null_counts[col] += batch[col].null_count()
+                sketches[col].update(batch[col])
+
+        for col in numeric_cols:
+            digest = digests[col]
+            if num_cfg.default_strategy == "median":
+                fill = digest.quantile(0.5)
+            elif num_cfg.default_strategy == "mean":
+                fill = sums[col] / digest.count if digest.count else None
+            else:
+                fill = num_cfg.default_fill_value
+            stats.numeric_fill[col] = fill
+            # quartiles are taken over the imputed column, as in the exact path
+            if fill is not None and stats.null_counts[col]:
+                digest.update(np.array([fill]), np.array([float(stats.null_counts[col])]))
+            stats.quartiles[col] = (digest.quantile(0.25), digest.quantile(0.75))
+
+        for col in cat_cols:
+            sketch = sketches[col]
+            if cat_cfg.default_strategy == "mode":
+                stats.modes[col] = sketch.top()
+                fill = stats.modes[col]
             else:
-                raise ValueError(f"Unsupported numeric imputation strategy: {cfg.default_strategy}")
+                fill = cat_cfg.default_fill_value
+            counts = sketch.frequent_counts()
+            if fill is not None:
+                counts[fill] = counts.get(fill, sketch.estimate(fill)) + stats.null_counts[col]
+            stats.category_counts[col] = counts
+
+        self._log(stage="sketch_stats").info(
+            "stats_sketched",
+            rows=stats.row_count,
+            numeric=len(numeric_cols),
+            categorical=len(cat_cols),
+        )
+        return stats
+
+    # ------------------------------------------------------------------- #
+    # Step 2: Numeric cleaning                                            #
+    # ------------------------------------------------------------------- #
+
+    def _clean_numeric(self, df: pl.LazyFrame, plan: CleaningPlan) -> pl.LazyFrame:
+        cfg = self.rules.cleaning.numeric
+        log = self._log(stage="numeric")
+
+        numeric_cols = self._numeric_columns(df.schema)
+        if not numeric_cols:
+            return df
 
-        df = df.with_columns(impute_exprs)
+        # Imputation according to default_strategy (constants from plan)
+        impute_exprs = [
+            pl.col(col).fill_null(plan.numeric_fill[col])
+            for col in numeric_cols
+            if col in plan.numeric_fill
+        ]
+        if impute_exprs:
+            df = df.with_columns(impute_exprs)
         self._audit["numeric_imputation_strategy"] = cfg.default_strategy
         log.info("numeric_imputation", columns=numeric_cols, strategy=cfg.default_strategy)
 
         # Outlier handling via IQR clipping (if configured)
-        if cfg.outlier_strategy and cfg.outlier_strategy.startswith("clip_iqr"):
-            # parse factor, e.g. "clip_iqr_1_5"
-            parts = cfg.outlier_strategy.split("_")
-            factor = 1.5
-            try:
-                factor = float(parts[-2]) / float(parts[-1])
-            except Exception:
-                pass
-
-            # Compute Q1, Q3, IQR and clip per column
-            for col in numeric_cols:
-                quantiles_lf = df.select(
-                    pl.col(col).quantile(0.25).alias("q1"),
-                    pl.col(col).quantile(0.75).alias("q3"),
-                )
-                q_df = quantiles_lf.collect()
-                q1 = q_df["q1"][0]
-                q3 = q_df["q3"][0]
-                iqr = q3 - q1
-                lower = q1 - factor * iqr
-                upper = q3 + factor * iqr
-
-                df = df.with_columns(
-                    pl.col(col).clip(lower, upper)
-                )
+        if self._iqr_factor() is not None:
+            clip_exprs = [
+                pl.col(col).clip(*plan.clip_bounds[col])
+                for col in numeric_cols
+                if col in plan.clip_bounds
+            ]
+            if clip_exprs:
+                df = df.with_columns(clip_exprs)
 
             self._audit["numeric_outlier_strategy"] = cfg.outlier_strategy
             log.info(
@@ -394,41 +930,22 @@ class DataCleaner:
     # Step 3: Categorical cleaning                                       #
     # ------------------------------------------------------------------- #
 
-    def _clean_categorical(self, df: pl.LazyFrame) -> pl.LazyFrame:
+    def _clean_categorical(self, df: pl.LazyFrame, plan: CleaningPlan) -> pl.LazyFrame:
         cfg = self.rules.cleaning.categorical
         log = self._log(stage="categorical")
 
-        cat_cols = [
-            name
-            for name, col_schema in self.rules.schema.items()
-            if col_schema.dtype == "string" and name in df.schema
-        ]
-
+        cat_cols = self._categorical_columns(df.schema)
         if not cat_cols:
             return df
 
-        # Imputation: mode or constant
-        for col in cat_cols:
-            if cfg.default_strategy == "mode":
-                mode_lf = df.select(pl.col(col).mode().alias("mode"))
-                mode_df = mode_lf.collect()
-                if mode_df.height == 0:
-                    continue
-                mode_val = mode_df["mode"][0]
-                df = df.with_columns(
-                    pl.col(col).fill_null(mode_val)
-                )
-            elif cfg.default_strategy == "constant":
-                if cfg.default_fill_value is None:
-                    raise ValueError(
-                        f"default_fill_value must be set for constant strategy (categorical col={col})"
-                    )
-                df = df.with_columns(
-                    pl.col(col).fill_null(cfg.default_fill_value)
-                )
-            else:
-                raise ValueError(f"Unsupported categorical imputation strategy: {cfg.default_strategy}")
-
+        # Imputation: mode or constant (constants from plan)
+        impute_exprs = [
+            pl.col(col).fill_null(plan.categorical_fill[col])
+            for col in cat_cols
+            if col in plan.categorical_fill
+        ]
+        if impute_exprs:
+            df = df.with_columns(impute_exprs)
         self._audit["categorical_imputation_strategy"] = cfg.default_strategy
         log.info(
             "categorical_imputation",
@@ -437,32 +954,24 @@ class DataCleaner:
         )
 
         # High-cardinality & rare-category handling (simple grouping to 'OTHER')
-        for col in cat_cols:
-            freq_lf = df.select(pl.col(col).value_counts())
-            freq_df = freq_lf.collect()
-            if freq_df.height == 0 or "counts" not in freq_df.columns:
-                continue
-
-            total = freq_df["counts"].sum()
-            freq_df = freq_df.with_columns(
-                (pl.col("counts") / total).alias("pct")
-            )
-            # Identify rare categories
-            rare_cats = (
-                freq_df.filter(pl.col("pct") < cfg.rare_category_min_pct)
-                .select("column_0")[  # column name depends on polars version; adjust if needed
-                0
-                ]
-                .to_list()
-            )
-
-            if cfg.rare_strategy_group_as_other and rare_cats:
-                df = df.with_columns(
-                    pl.when(pl.col(col).is_in(rare_cats))
-                    .then("OTHER")
-                    .otherwise(pl.col(col))
-                    .alias(col)
-                )
+        rare_exprs = [
+            pl.when(pl.col(col).is_in(plan.rare_categories[col]))
+            .then(pl.lit("OTHER"))
+            .otherwise(pl.col(col))
+            .alias(col)
+            for col in cat_cols
+            if col in plan.rare_categories
+        ]
+        rare_exprs += [
+            pl.when(pl.col(col).is_not_null() & ~pl.col(col).is_in(plan.frequent_categories[col]))
+            .then(pl.lit("OTHER"))
+            .otherwise(pl.col(col))
+            .alias(col)
+            for col in cat_cols
+            if col in plan.frequent_categories
+        ]
+        if rare_exprs:
+            df = df.with_columns(rare_exprs)
 
         self._audit["categorical_rare_threshold"] = cfg.rare_category_min_pct
         return df
@@ -471,7 +980,7 @@ class DataCleaner:
     # Step 4: Datetime cleaning                                          #
     # ------------------------------------------------------------------- #
 
-    def _clean_datetime(self, df: pl.LazyFrame) -> pl.LazyFrame:
+    def _clean_datetime(self, df: pl.LazyFrame, streaming: bool = False) -> pl.LazyFrame:
         dt_rules = self.rules.cleaning.datetime
         if not dt_rules:
             return df
@@ -489,7 +998,11 @@ class DataCleaner:
 
             df = df.with_columns(expr.alias(col))
 
-            if rule.fill_strategy == "ffill":
+            if rule.fill_strategy and streaming:
+                # ffill/bfill depend on global row order and cannot stream
+                self._audit.setdefault("datetime_fill_skipped", []).append(col)
+                log.warning("datetime_fill_skipped_streaming", column=col, fill=rule.fill_strategy)
+            elif rule.fill_strategy == "ffill":
                 df = df.with_columns(pl.col(col).forward_fill())
             elif rule.fill_strategy == "bfill":
                 df = df.with_columns(pl.col(col).backward_fill())
@@ -501,6 +1014,239 @@ class DataCleaner:
         return df
 
 
+# ---------------------------------------------------------------------------
+# Partition-parallel runner
+# ---------------------------------------------------------------------------
+
+
+def _clean_partition(
+    rules: CleaningRules,
+    plan: CleaningPlan,
+    correlation_id: Optional[str],
+    src: str,
+    dst: str,
+    fill_seeds: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Worker: apply a shared plan to one partition and write it atomically.
+
+    `fill_seeds` holds, per ffill/bfill datetime column, the boundary value
+    carried in from neighbouring partitions; it fills the nulls a
+    within-partition fill leaves at the partition edge.
+    """
+    started = time.perf_counter()
+    cleaner = DataCleaner(rules=rules, correlation_id=correlation_id)
+    lf = cleaner.apply(DataCleaner._scan_source(src), plan)
+    seeds = {col: value for col, value in (fill_seeds or {}).items() if value is not None}
+    if seeds:
+        lf = lf.with_columns([pl.col(col).fill_null(value) for col, value in seeds.items()])
+    out = lf.collect()
+
+    dst_path = Path(dst)
+    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dst_path.with_name(f".{dst_path.name}.tmp")
+    out.write_parquet(tmp_path)
+    os.replace(tmp_path, dst_path)  # resume never sees half-written output
+
+    audit = dict(cleaner._audit)
+    audit.update(
+        partition=src,
+        rows_out=out.height,
+        elapsed_s=round(time.perf_counter() - started, 3),
+    )
+    return audit
+
+
+@dataclass
+class ParallelCleaner:
+    """
+    Clean many partitions with one globally fitted plan.
+
+    The plan is fitted once over all partitions and persisted next to the
+    output, then every partition is cleaned independently in a process
+    pool (or local Ray). Because each worker applies the same constants,
+    the output matches a single-process run over the partitions
+    concatenated in the given order. Order-dependent datetime fills
+    (ffill/bfill) get the boundary value from the neighbouring partitions,
+    found in one extra pass over the fill columns before dispatch.
+    """
+
+    rules: CleaningRules
+    correlation_id: Optional[str] = None
+    max_workers: Optional[int] = None
+    backend: str = "process"  # "process" | "ray"
+
+    PLAN_FILE = "_cleaning_plan.json"
+
+    def _log(self, **kwargs: Any) -> structlog.BoundLogger:
+        base = {"corr_id": self.correlation_id, "table": self.rules.table}
+        base.update(kwargs)
+        return logger.bind(**base)
+
+    def run(self, partitions: Sequence[str], output_dir: Path) -> Dict[str, Any]:
+        """Fit (or reuse) the global plan, then clean pending partitions."""
+        log = self._log(stage="parallel")
+        started = time.perf_counter()
+        if not partitions:
+            return {"partitions_total": 0}
+
+        plan, fit_audit = self._fit_or_load_plan(partitions, output_dir)
+
+        targets = self._output_paths(partitions, output_dir)
+        done = {src for src, dst in targets if self._is_done(dst)}
+        seeds = self._fill_seeds(plan, partitions) if len(done) < len(targets) else [{} for _ in targets]
+        pending = [(src, dst, seed) for (src, dst), seed in zip(targets, seeds) if src not in done]
+        skipped = sorted(done)
+        log.info("partitions_planned", total=len(targets), pending=len(pending), skipped=len(skipped))
+
+        if self.backend == "ray":
+            results = self._run_ray(plan, pending)
+        elif self.backend == "process":
+            results = self._run_processes(plan, pending)
+        else:
+            raise ValueError(f"Unsupported backend: {self.backend}")
+
+        audit = self._merge_audits(fit_audit, results)
+        audit.update(
+            partitions_total=len(targets),
+            partitions_skipped=skipped,
+            rule_version=plan.rule_version,
+            elapsed_s=round(time.perf_counter() - started, 3),
+        )
+        log.info("parallel_cleaning_complete", audit=audit)
+        return audit
+
+    def _fit_or_load_plan(
+        self, partitions: Sequence[str], output_dir: Path
+    ) -> Tuple[CleaningPlan, Dict[str, Any]]:
+        """Reuse a persisted plan for the current rule_version, else fit globally."""
+        plan_path = output_dir / self.PLAN_FILE
+        if plan_path.exists():
+            plan = CleaningPlan.load(plan_path)
+            if plan.table == self.rules.table and plan.rule_version == self.rules.rule_version:
+                return plan, {"plan_reused": True, "rows_in": plan.rows_fitted}
+
+        cleaner = DataCleaner(rules=self.rules, correlation_id=self.correlation_id)
+        scans = [DataCleaner._scan_source(p) for p in partitions]
+        plan = cleaner.fit(pl.concat(scans, how="vertical"))
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        plan.save(plan_path)
+        return plan, dict(cleaner._audit, plan_reused=False)
+
+    def _fill_seeds(self, plan: CleaningPlan, partitions: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Per partition, the value each ffill/bfill column should start from:
+        the last non-null value of the earlier partitions (ffill) or the
+        first non-null value of the later ones (bfill), after cleaning.
+        """
+        fills = {rule.column: rule.fill_strategy for rule in self.rules.cleaning.datetime if rule.fill_strategy}
+        if not fills:
+            return [{} for _ in partitions]
+
+        # clean without the fills themselves to read each partition's edges
+        no_fill = self.rules.copy(deep=True)
+        for rule in no_fill.cleaning.datetime:
+            rule.fill_strategy = None
+        cleaner = DataCleaner(rules=no_fill, correlation_id=self.correlation_id)
+
+        edges: List[Dict[str, Any]] = []
+        for src in partitions:
+            lf = cleaner.apply(DataCleaner._scan_source(src), plan)
+            cols = [col for col in fills if col in lf.schema]
+            if not cols:
+                edges.append({})
+                continue
+            row = lf.select(
+                [pl.col(col).drop_nulls().first().alias(f"first:{col}") for col in cols]
+                + [pl.col(col).drop_nulls().last().alias(f"last:{col}") for col in cols]
+            ).collect().row(0, named=True)
+            edges.append(row)
+
+        seeds: List[Dict[str, Any]] = [{} for _ in partitions]
+        for col, strategy in fills.items():
+            carried = None
+            order = range(len(partitions)) if strategy == "ffill" else reversed(range(len(partitions)))
+            edge = "last" if strategy == "ffill" else "first"
+            for i in order:
+                seeds[i][col] = carried
+                value = edges[i].get(f"{edge}:{col}")
+                if value is not None:
+                    carried = value
+        return seeds
+
+    @staticmethod
+    def _output_paths(partitions: Sequence[str], output_dir: Path) -> List[Tuple[str, Path]]:
+        """Mirror each partition's path (relative to their common root) under output_dir."""
+        if len(partitions) == 1:
+            root = Path(partitions[0]).parent
+        else:
+            root = Path(os.path.commonpath([str(Path(p).parent) for p in partitions]))
+        return [
+            (src, (output_dir / Path(src).relative_to(root)).with_suffix(".parquet"))
+            for src in partitions
+        ]
+
+    def _is_done(self, dst: Path) -> bool:
+        """A partition is done if its output carries the current rule_version."""
+        if not dst.exists():
+            return False
+        try:
+            version = (
+                pl.scan_parquet(dst)
+                .select(pl.col("_cleaning_rule_version").first())
+                .collect()
+                .item()
+            )
+        except Exception:
+            return False
+        return version == self.rules.rule_version
+
+    def _run_processes(
+        self, plan: CleaningPlan, pending: Sequence[Tuple[str, Path, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(_clean_partition, self.rules, plan, self.correlation_id, src, str(dst), seed)
+                for src, dst, seed in pending
+            ]
+            for fut in as_completed(futures):
+                results.append(fut.result())
+        return results
+
+    def _run_ray(
+        self, plan: CleaningPlan, pending: Sequence[Tuple[str, Path, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        import ray  # optional dependency
+
+        ray.init(ignore_reinit_error=True, num_cpus=self.max_workers)
+        remote = ray.remote(_clean_partition)
+        rules_ref, plan_ref = ray.put(self.rules), ray.put(plan)
+        refs = [
+            remote.remote(rules_ref, plan_ref, self.correlation_id, src, str(dst), seed)
+            for src, dst, seed in pending
+        ]
+        return list(ray.get(refs))
+
+    @staticmethod
+    def _merge_audits(fit_audit: Dict[str, Any], results: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fold per-partition audits into one job-level audit."""
+        audit = dict(fit_audit)
+        audit["rows_out"] = sum(r.get("rows_out", 0) for r in results)
+        audit["partitions_cleaned"] = len(results)
+        audit["partition_elapsed_s"] = {r["partition"]: r["elapsed_s"] for r in results}
+        skipped_fills = sorted({c for r in results for c in r.get("datetime_fill_skipped", [])})
+        if skipped_fills:
+            audit["datetime_fill_skipped"] = skipped_fills
+        # step settings are identical across partitions; keep one copy
+        for r in results:
+            for key, value in r.items():
+                if key not in ("partition", "rows_out", "elapsed_s", "datetime_fill_skipped"):
+                    audit.setdefault(key, value)
+        return audit
+
+
 # ---------------------------------------------------------------------------
 # Example usage (conceptual)
 # ---------------------------------------------------------------------------
@@ -525,3 +1271,24 @@ if __name__ == "__main__":
     cleaned_lf = cleaner.transform(df)
     cleaned_df = cleaned_lf.collect()
     print(cleaned_df)
+
+    # Fit once, persist, and apply the same plan to every micro-batch
+    plan = cleaner.fit(df)
+    plan.save(Path("plans/transaction_features.plan.json"))
+    plan = CleaningPlan.load(Path("plans/transaction_features.plan.json"))
+    print(cleaner.apply(df, plan).collect(streaming=True))
+
+    # Out-of-core: bounded memory from scan to sink
+    audit = cleaner.transform_streaming(
+        "data/transactions/*.parquet",
+        Path("clean/transactions.parquet"),
+        memory_budget_mb=1024,
+    )
+    print(audit["rows_per_sec"], audit["peak_rss_mb"])
+
+    # Partition-parallel: one global plan, many worker processes, resumable
+    job_audit = ParallelCleaner(rules=rules, correlation_id="run-2025-03-15T10:00Z").run(
+        sorted(glob.glob("data/transactions/date=*/*.parquet")),
+        Path("clean/transactions"),
+    )
+    print(job_audit["rows_out"], job_audit["partitions_skipped"])